@@ -0,0 +1,95 @@
+"""
+Recall vs latency of the ANN index tiers against the exact flat baseline.
+
+Builds every kind from services/ann_index.py over the same vectors, then
+for each search setting (HNSW efSearch / IVF nprobe) reports recall@k
+against IndexFlatIP ground truth, mean query latency and index build time.
+
+Usage (from backend/):
+    python benchmarks/ann_benchmark.py --n 20000 --dim 1024
+    python benchmarks/ann_benchmark.py --vectors my_embeddings.npy
+
+Without --vectors, clustered unit vectors are generated so neighbourhoods
+look like real embedding data rather than uniform noise.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import faiss
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import ann_index  # noqa: E402
+
+
+def _synthetic(n: int, dim: int, clusters: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, n)
+    vectors = centers[labels] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def _recall(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def _timed_search(index, queries: np.ndarray, k: int) -> tuple[np.ndarray, float]:
+    start = time.perf_counter()
+    _, ids = index.search(queries, k)
+    return ids, (time.perf_counter() - start) / len(queries) * 1000
+
+
+def main(args):
+    if args.vectors:
+        vectors = np.load(args.vectors).astype(np.float32)
+        faiss.normalize_L2(vectors)
+    else:
+        vectors = _synthetic(args.n + args.queries, args.dim, args.clusters, args.seed)
+    queries, vectors = vectors[:args.queries], vectors[args.queries:]
+    ids = np.arange(len(vectors), dtype=np.int64)
+    print(f"{len(vectors)} vectors × {vectors.shape[1]} dims, {len(queries)} queries, k={args.k}\n")
+
+    faiss.omp_set_num_threads(1)   # per-query latency, as in a request handler
+    flat = ann_index.build_index("flat", vectors, ids)
+    truth, flat_ms = _timed_search(flat, queries, args.k)
+
+    print(f"{'index':<8} {'setting':<14} {'recall@k':>9} {'ms/query':>9} {'speedup':>8} {'build s':>8}")
+    print(f"{'flat':<8} {'exact':<14} {1.0:>9.4f} {flat_ms:>9.3f} {1.0:>8.1f} {'-':>8}")
+
+    for kind, knob, settings in [
+        ("hnsw", "efSearch", args.ef_search),
+        ("ivfpq", "nprobe", args.nprobe),
+    ]:
+        start = time.perf_counter()
+        index = ann_index.build_index(kind, vectors, ids)
+        build_s = time.perf_counter() - start
+        inner = faiss.downcast_index(index.index)
+        for value in settings:
+            if kind == "hnsw":
+                inner.hnsw.efSearch = value
+            else:
+                inner.nprobe = value
+            found, ms = _timed_search(index, queries, args.k)
+            print(f"{kind:<8} {f'{knob}={value}':<14} {_recall(found, truth):>9.4f} "
+                  f"{ms:>9.3f} {flat_ms / ms:>8.1f} {build_s:>8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--vectors", help=".npy matrix of real embeddings (overrides --n/--dim)")
+    parser.add_argument("--n", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 32, 64, 128, 256])
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 16, 64])
+    main(parser.parse_args())
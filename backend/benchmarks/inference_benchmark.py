@@ -0,0 +1,220 @@
+"""
+Accuracy parity and throughput of the inference backends.
+
+Loads each model (CV embedding, reranker, tender embedding) once on the
+PyTorch baseline and once on every other requested backend, runs the same
+inputs through both, and reports:
+  - embeddings: cosine similarity to the PyTorch vectors (min / mean)
+  - reranker:   max |logit diff|, Spearman rank correlation and top-k overlap
+  - tenders:    Spearman correlation of the tender ranking against the profile
+  - throughput: texts (or pairs) per second for every backend
+
+Inputs are CV texts from the local SQLite DB and tenders from TENDERS_CSV_PATH
+when available, otherwise a small built-in sample.
+
+Usage (from backend/):
+    python benchmarks/inference_benchmark.py --backends onnx onnx-int8
+    python benchmarks/inference_benchmark.py --models reranker --limit 200
+
+Exits 1 if any backend falls below --min-cosine or --min-spearman.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import (  # noqa: E402
+    EMBEDDING_MODEL,
+    RERANKER_MODEL,
+    TENDER_EMBEDDING_MODEL,
+    TENDERS_CSV_PATH,
+    COMPANY_PROFILE_PATH
+)
+from services.model_provider import load_with_backend  # noqa: E402
+
+SAMPLE_REQUIREMENTS = (
+    "Senior backend engineer with Python, FastAPI and PostgreSQL. "
+    "Experience with Docker, Kubernetes and CI/CD on AWS. English and French."
+)
+
+SAMPLE_CVS = [
+    "Backend developer, 6 years of Python, Django and FastAPI. PostgreSQL, Redis, Docker, GitLab CI. AWS certified.",
+    "Data scientist: pandas, scikit-learn, PyTorch, NLP with transformers, MLflow. Master in applied mathematics.",
+    "Frontend engineer: React, Next.js, TypeScript, Tailwind. Some Node.js and Express. Figma to code.",
+    "DevOps engineer: Kubernetes, Terraform, Ansible, Jenkins, Prometheus, Grafana on Azure and GCP.",
+    "Java developer: Spring Boot, Hibernate, Oracle, microservices, Kafka. Agile Scrum, 8 years.",
+    "Mobile developer: Flutter and Kotlin, Firebase, REST APIs, published apps on both stores.",
+    "Network administrator: Cisco, VLANs, firewalls, Windows Server, Active Directory, ITIL.",
+    "Full-stack Python developer: Flask, FastAPI, Vue.js, MySQL, Docker Compose, unit testing with pytest.",
+]
+
+
+def _load_cv_texts(limit: int) -> list[str]:
+    try:
+        from database import SessionLocal, CV
+        db = SessionLocal()
+        try:
+            texts = [row.raw_text for row in db.query(CV.raw_text).limit(limit).all() if row.raw_text]
+        finally:
+            db.close()
+    except Exception as e:
+        print(f"  (no CV texts from DB: {type(e).__name__}: {e})")
+        texts = []
+    return texts or SAMPLE_CVS
+
+
+def _spearman(a, b) -> float:
+    ra = np.argsort(np.argsort(a))
+    rb = np.argsort(np.argsort(b))
+    if len(ra) < 2:
+        return 1.0
+    return float(np.corrcoef(ra, rb)[0, 1])
+
+
+def _timed(fn, *args, repeats: int):
+    fn(*args)   # warm-up: first call pays graph / allocator setup
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = fn(*args)
+    return result, (time.perf_counter() - start) / repeats
+
+
+def _bench_bi_encoder(label, model_id, texts, backends, repeats, batch_size):
+    from sentence_transformers import SentenceTransformer
+
+    def encode(model, items):
+        return model.encode(items, normalize_embeddings=True, batch_size=batch_size)
+
+    print(f"\n== {label}: {model_id} ({len(texts)} texts)")
+    base_model, _ = load_with_backend(SentenceTransformer, model_id, "torch")
+    base, base_t = _timed(encode, base_model, texts, repeats=repeats)
+    print(f"  {'torch':<10} {len(texts) / base_t:8.1f} texts/s")
+    del base_model
+
+    results = {}
+    for backend in backends:
+        model, _ = load_with_backend(SentenceTransformer, model_id, backend)
+        vecs, t = _timed(encode, model, texts, repeats=repeats)
+        cos = np.sum(vecs * base, axis=1)
+        results[backend] = float(cos.min())
+        print(f"  {backend:<10} {len(texts) / t:8.1f} texts/s  x{base_t / t:.2f}  "
+              f"cosine min {cos.min():.4f} mean {cos.mean():.4f}")
+        del model
+    return results
+
+
+def _bench_cross_encoder(model_id, requirements, texts, backends, repeats, batch_size, top_k):
+    from sentence_transformers import CrossEncoder
+
+    pairs = [(requirements, t) for t in texts]
+
+    def predict(model, items):
+        return np.asarray(model.predict(items, batch_size=batch_size), dtype=np.float32)
+
+    print(f"\n== reranker: {model_id} ({len(pairs)} pairs)")
+    base_model, _ = load_with_backend(CrossEncoder, model_id, "torch")
+    base, base_t = _timed(predict, base_model, pairs, repeats=repeats)
+    print(f"  {'torch':<10} {len(pairs) / base_t:8.1f} pairs/s")
+    del base_model
+
+    k = min(top_k, len(pairs))
+    base_top = set(np.argsort(-base)[:k])
+    results = {}
+    for backend in backends:
+        model, _ = load_with_backend(CrossEncoder, model_id, backend)
+        scores, t = _timed(predict, model, pairs, repeats=repeats)
+        rho = _spearman(scores, base)
+        overlap = len(base_top & set(np.argsort(-scores)[:k])) / k
+        results[backend] = rho
+        print(f"  {backend:<10} {len(pairs) / t:8.1f} pairs/s  x{base_t / t:.2f}  "
+              f"max|diff| {np.abs(scores - base).max():.4f}  spearman {rho:.4f}  top-{k} overlap {overlap:.2f}")
+        del model
+    return results
+
+
+def _tender_inputs(limit: int):
+    try:
+        from services.tender_detector import load_company_profile, load_tenders_from_csv
+        profile = load_company_profile(COMPANY_PROFILE_PATH)
+        tenders = load_tenders_from_csv(TENDERS_CSV_PATH)[:limit]
+        return profile["profile_text"], [t["tender_text"] for t in tenders]
+    except Exception as e:
+        print(f"  (no tender data: {type(e).__name__}: {e})")
+        return SAMPLE_REQUIREMENTS, SAMPLE_CVS
+
+
+def _tender_ranking_parity(model_id, backends, limit, batch_size):
+    from sentence_transformers import SentenceTransformer
+
+    profile_text, tender_texts = _tender_inputs(limit)
+
+    def sims(model):
+        company = model.encode([profile_text], normalize_embeddings=True)[0]
+        return model.encode(tender_texts, normalize_embeddings=True, batch_size=batch_size) @ company
+
+    base_model, _ = load_with_backend(SentenceTransformer, model_id, "torch")
+    base = sims(base_model)
+    del base_model
+
+    results = {}
+    for backend in backends:
+        model, _ = load_with_backend(SentenceTransformer, model_id, backend)
+        rho = _spearman(sims(model), base)
+        results[backend] = rho
+        print(f"  {backend:<10} tender ranking spearman {rho:.4f} over {len(tender_texts)} tenders")
+        del model
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["onnx", "onnx-int8"])
+    parser.add_argument("--models", nargs="+", default=["embedding", "reranker", "tender"],
+                        choices=["embedding", "reranker", "tender"])
+    parser.add_argument("--limit", type=int, default=100, help="Max CVs / tenders to use")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--min-cosine", type=float, default=0.98)
+    parser.add_argument("--min-spearman", type=float, default=0.95)
+    args = parser.parse_args()
+
+    cv_texts = _load_cv_texts(args.limit)
+    failures = []
+
+    if "embedding" in args.models:
+        for backend, cos in _bench_bi_encoder("embedding", EMBEDDING_MODEL, cv_texts,
+                                              args.backends, args.repeats, args.batch_size).items():
+            if cos < args.min_cosine:
+                failures.append(f"embedding/{backend}: min cosine {cos:.4f} < {args.min_cosine}")
+
+    if "reranker" in args.models:
+        for backend, rho in _bench_cross_encoder(RERANKER_MODEL, SAMPLE_REQUIREMENTS, cv_texts, args.backends,
+                                                 args.repeats, args.batch_size, args.top_k).items():
+            if rho < args.min_spearman:
+                failures.append(f"reranker/{backend}: spearman {rho:.4f} < {args.min_spearman}")
+
+    if "tender" in args.models:
+        _, tender_texts = _tender_inputs(args.limit)
+        for backend, cos in _bench_bi_encoder("tender", TENDER_EMBEDDING_MODEL, tender_texts,
+                                              args.backends, args.repeats, args.batch_size).items():
+            if cos < args.min_cosine:
+                failures.append(f"tender/{backend}: min cosine {cos:.4f} < {args.min_cosine}")
+        for backend, rho in _tender_ranking_parity(TENDER_EMBEDDING_MODEL, args.backends,
+                                                   args.limit, args.batch_size).items():
+            if rho < args.min_spearman:
+                failures.append(f"tender/{backend}: ranking spearman {rho:.4f} < {args.min_spearman}")
+
+    if failures:
+        print("\nPARITY FAILED:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print("\nParity OK for all backends.")
+
+
+if __name__ == "__main__":
+    main()
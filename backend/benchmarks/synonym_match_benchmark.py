@@ -0,0 +1,196 @@
+"""
+Micro-benchmark: compute_full_profile_score against the original
+nested-loop implementation it replaced.
+
+Generates random CV / requirements profiles from the SYNONYM_MAP vocabulary
+(plus paraphrases, partial words and noise so every matching strategy is
+exercised), checks that score, matched and missing are identical for every
+pair, then times both implementations on the same pairs.
+
+Usage (from backend/):
+    python benchmarks/synonym_match_benchmark.py --pairs 2000
+
+Exits 1 on the first mismatch.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.skill_extractor import SYNONYM_MAP, compute_full_profile_score  # noqa: E402
+
+NOISE = [
+    "team player", "java", "javascript", "excel reporting", "agile delivery", "sql server",
+    "cloud migration", "python scripting", "machine learning engineer", "client relations",
+    "medical records", "financial reporting", "legal", "ai", "data", "ops", "", "  Docker  ",
+]
+
+
+# ── Reference: the implementation before the synonym graph was precompiled ──
+
+def _legacy_check_synonyms(req_signal: str, cv_signals: set[str]) -> bool:
+    req_lower = req_signal.lower().strip()
+    synonyms = SYNONYM_MAP.get(req_lower, [])
+    for synonym in synonyms:
+        if any(synonym in cv_s or cv_s in synonym for cv_s in cv_signals):
+            return True
+    for cv_s in cv_signals:
+        cv_synonyms = SYNONYM_MAP.get(cv_s, [])
+        if req_lower in cv_synonyms:
+            return True
+        if any(req_lower in syn or syn in req_lower for syn in cv_synonyms):
+            return True
+    return False
+
+
+def _legacy_score(cv_profile: dict, req_profile: dict):
+    cv_signals: set[str] = set()
+    for key in ["skills", "experience_keywords", "project_keywords",
+                "certifications", "implied_capabilities"]:
+        for s in cv_profile.get(key, []):
+            if isinstance(s, str):
+                cv_signals.add(s.lower().strip())
+    if cv_profile.get("domain") and isinstance(cv_profile["domain"], str):
+        cv_signals.add(cv_profile["domain"].lower().strip())
+
+    req_signals: set[str] = set()
+    for key in ["required_skills", "keywords", "certifications", "implied_skills"]:
+        for s in req_profile.get(key, []):
+            if isinstance(s, str):
+                req_signals.add(s.lower().strip())
+    if not req_signals:
+        return 0.0, [], []
+
+    matched, missing = [], []
+    for req_signal in req_signals:
+        req_words = set(req_signal.split())
+        exact = req_signal in cv_signals
+        substring = any(req_signal in cv_s or cv_s in req_signal for cv_s in cv_signals)
+        word_overlap = False
+        if len(req_words) > 1:
+            word_overlap = any(
+                len(req_words & set(cv_s.split())) / max(len(req_words), 1) >= 0.5
+                for cv_s in cv_signals
+            )
+        synonym_match = _legacy_check_synonyms(req_signal, cv_signals)
+        if exact or substring or word_overlap or synonym_match:
+            matched.append(req_signal)
+        else:
+            missing.append(req_signal)
+
+    domain_bonus = 0.0
+    cv_domain = cv_profile.get("domain", "")
+    req_domain = req_profile.get("domain", "")
+    if (isinstance(cv_domain, str) and isinstance(req_domain, str)
+            and cv_domain and req_domain):
+        cv_d, req_d = cv_domain.lower(), req_domain.lower()
+        if set(cv_d.split()) & set(req_d.split()) or cv_d in req_d or req_d in cv_d:
+            domain_bonus = 0.20
+    base_score = len(matched) / len(req_signals)
+    return round(min(1.0, base_score + domain_bonus), 4), matched, missing
+
+
+# ── Random profiles ──────────────────────────────────────────────────────────
+
+def _vocabulary() -> list[str]:
+    words = set(SYNONYM_MAP)
+    for synonyms in SYNONYM_MAP.values():
+        words.update(synonyms)
+    return sorted(words)
+
+
+def _mutate(rng: random.Random, phrase: str) -> str:
+    roll = rng.random()
+    if roll < 0.15 and len(phrase) > 4:
+        return phrase[:rng.randint(2, len(phrase) - 1)]          # partial word
+    if roll < 0.30:
+        return f"{phrase} {rng.choice(['expert', 'tools', 'development', 'lead'])}"
+    if roll < 0.40:
+        return phrase.upper()
+    return phrase
+
+
+def _signals(rng: random.Random, vocab: list[str], n: int) -> list[str]:
+    return [_mutate(rng, rng.choice(vocab)) if rng.random() > 0.2 else rng.choice(NOISE)
+            for _ in range(n)]
+
+
+def _profile(rng: random.Random, vocab: list[str], fields: dict[str, tuple[int, int]], domains: list[str]) -> dict:
+    profile = {"domain": rng.choice(domains)}
+    for key, (low, high) in fields.items():
+        profile[key] = _signals(rng, vocab, rng.randint(low, high))
+    return profile
+
+
+def _pairs(n: int, seed: int, per_request: int) -> list[tuple[dict, dict]]:
+    """Like /match/: each requirements profile is scored against per_request CVs."""
+    rng = random.Random(seed)
+    vocab = _vocabulary()
+    pairs = []
+    req = None
+    for i in range(n):
+        if i % per_request == 0:
+            req = _profile(rng, vocab, {
+                "required_skills": (0, 12), "keywords": (0, 8),
+                "certifications": (0, 2), "implied_skills": (0, 6)
+            }, ["Software Engineering", "Corporate Finance", "Medicine", ""])
+        cv = _profile(rng, vocab, {
+            "skills": (0, 25), "experience_keywords": (0, 10), "project_keywords": (0, 10),
+            "certifications": (0, 3), "implied_capabilities": (0, 8)
+        }, ["Software Engineering", "Finance", "Healthcare", "", "Data Science"])
+        pairs.append((cv, req))
+    return pairs
+
+
+def _time(fn, pairs, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for cv, req in pairs:
+            fn(cv, req)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pairs", type=int, default=2000)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--per-request", type=int, default=20, help="CVs scored per requirements profile")
+    args = parser.parse_args()
+
+    pairs = _pairs(args.pairs, args.seed, args.per_request)
+
+    # compute_full_profile_score prints domain matches; keep the output readable
+    stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+    try:
+        mismatches = [
+            (cv, req) for cv, req in pairs
+            if compute_full_profile_score(cv, req) != _legacy_score(cv, req)
+        ]
+        legacy_t = _time(_legacy_score, pairs, args.repeats)
+        compiled_t = _time(compute_full_profile_score, pairs, args.repeats)
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    if mismatches:
+        cv, req = mismatches[0]
+        print(f"MISMATCH on {len(mismatches)}/{len(pairs)} pairs, first one:")
+        print(f"  cv:  {cv}\n  req: {req}")
+        print(f"  new:    {compute_full_profile_score(cv, req)}")
+        print(f"  legacy: {_legacy_score(cv, req)}")
+        sys.exit(1)
+
+    print(f"Identical score / matched / missing on {len(pairs)} pairs.")
+    print(f"  legacy nested loops : {legacy_t * 1e6 / len(pairs):8.1f} µs/pair")
+    print(f"  precompiled graph   : {compiled_t * 1e6 / len(pairs):8.1f} µs/pair  (x{legacy_t / compiled_t:.1f})")
+
+
+if __name__ == "__main__":
+    main()
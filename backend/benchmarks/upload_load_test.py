@@ -0,0 +1,166 @@
+"""
+Load test: /health latency must stay flat while CVs are being uploaded.
+
+Runs against a live server (python -m uvicorn main:app --port 8000):
+  1. probes /health alone to get a baseline
+  2. probes /health again while --uploads PDFs are posted to /cvs/upload
+     with --concurrency parallel clients; uploads return 202 with a task id,
+     so probing goes on until every task is polled to done / failed on
+     /cvs/tasks/{task_id}
+  3. deletes the throw-away job once ingestion is over and compares the two
+     latency profiles
+
+Usage (from backend/):
+    python benchmarks/upload_load_test.py --uploads 12 --concurrency 4
+
+Requires httpx (pip install httpx). Exits 1 if p95 during ingestion exceeds
+max(3 x baseline p95, baseline p95 + 50 ms), or if any upload failed.
+"""
+
+import argparse
+import asyncio
+import glob
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+def _summary(label: str, latencies: list[float]) -> dict:
+    stats = {
+        "n": len(latencies),
+        "p50": statistics.median(latencies) * 1000,
+        "p95": _percentile(latencies, 95) * 1000,
+        "max": max(latencies) * 1000,
+    }
+    print(f"{label:<18} n={stats['n']:<5} p50={stats['p50']:.1f}ms "
+          f"p95={stats['p95']:.1f}ms max={stats['max']:.1f}ms")
+    return stats
+
+
+async def _probe_health(client: httpx.AsyncClient, stop: asyncio.Event,
+                        interval: float) -> list[float]:
+    latencies = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.get("/health")
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def _upload(client: httpx.AsyncClient, sem: asyncio.Semaphore,
+                  path: str, job_id: int, i: int) -> tuple[float, str | None]:
+    """POST one PDF → (time until accepted, task id or None if rejected)."""
+    async with sem:
+        with open(path, "rb") as f:
+            content = f.read()
+        name = f"loadtest_{i}_{os.path.basename(path)}"
+        start = time.perf_counter()
+        response = await client.post(
+            "/cvs/upload",
+            files={"file": (name, content, "application/pdf")},
+            data={"job_id": str(job_id)},
+        )
+        elapsed = time.perf_counter() - start
+        if response.status_code != 202:
+            print(f"  upload {name} → {response.status_code}: {response.text[:120]}")
+            return elapsed, None
+        return elapsed, response.json()["task_id"]
+
+
+async def _wait_for_task(client: httpx.AsyncClient, task_id: str, start: float,
+                         interval: float, timeout: float) -> tuple[float, str]:
+    """Poll /cvs/tasks/{task_id} → (seconds from start until finished, final status)."""
+    while time.perf_counter() - start < timeout:
+        response = await client.get(f"/cvs/tasks/{task_id}")
+        response.raise_for_status()
+        task = response.json()
+        if task["status"] in ("done", "failed", "cancelled"):
+            if task["status"] == "failed":
+                print(f"  task {task_id} ({task['filename']}) failed: {task.get('error')}")
+            return time.perf_counter() - start, task["status"]
+        await asyncio.sleep(interval)
+    print(f"  task {task_id} still not finished after {timeout:.0f}s")
+    return time.perf_counter() - start, "timeout"
+
+
+async def _ingest(client: httpx.AsyncClient, sem: asyncio.Semaphore, path: str,
+                  job_id: int, i: int, args) -> tuple[float, float | None, str]:
+    """Upload, then wait for ingestion → (accept time, end-to-end time, status)."""
+    start = time.perf_counter()
+    accepted, task_id = await _upload(client, sem, path, job_id, i)
+    if task_id is None:
+        return accepted, None, "rejected"
+    total, status = await _wait_for_task(client, task_id, start, args.poll_interval, args.task_timeout)
+    return accepted, total, status
+
+
+async def main(args) -> int:
+    pdfs = sorted(glob.glob(os.path.join(args.pdf_dir, "*.pdf")))
+    if not pdfs:
+        print(f"No PDFs found in {args.pdf_dir}")
+        return 1
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=600) as client:
+        # 1. Baseline
+        stop = asyncio.Event()
+        probe = asyncio.create_task(_probe_health(client, stop, args.interval))
+        await asyncio.sleep(args.baseline_seconds)
+        stop.set()
+        baseline = _summary("health (idle)", await probe)
+
+        # 2. Under upload load, until every ingestion task has finished
+        stop = asyncio.Event()
+        probe = asyncio.create_task(_probe_health(client, stop, args.interval))
+        sem = asyncio.Semaphore(args.concurrency)
+        start = time.perf_counter()
+        results = await asyncio.gather(*[
+            _ingest(client, sem, pdfs[i % len(pdfs)], args.job_id, i, args)
+            for i in range(args.uploads)
+        ])
+        wall = time.perf_counter() - start
+        stop.set()
+        loaded = _summary("health (uploads)", await probe)
+        _summary("upload accepted", [accepted for accepted, _, _ in results])
+        finished = [total for _, total, status in results if status == "done"]
+        if finished:
+            _summary("upload → done", finished)
+        failed = [status for _, _, status in results if status != "done"]
+        print(f"{args.uploads} uploads ingested in {wall:.1f}s ({len(failed)} not done)")
+
+        # 3. Cleanup — no task of the job is still running at this point
+        await client.delete(f"/cvs/job/{args.job_id}")
+
+    limit = max(3 * baseline["p95"], baseline["p95"] + 50)
+    if failed:
+        print(f"FAIL: {len(failed)} upload(s) did not finish ingestion: {sorted(set(failed))}")
+        return 1
+    if loaded["p95"] > limit:
+        print(f"FAIL: /health p95 {loaded['p95']:.1f}ms > {limit:.1f}ms during uploads")
+        return 1
+    print(f"OK: /health p95 stayed within {limit:.1f}ms during uploads")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--job-id", type=int, default=990001, help="Throw-away job id")
+    parser.add_argument("--pdf-dir", default="./data/cvs")
+    parser.add_argument("--uploads", type=int, default=12)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--interval", type=float, default=0.05, help="Seconds between /health probes")
+    parser.add_argument("--baseline-seconds", type=float, default=5.0)
+    parser.add_argument("--poll-interval", type=float, default=0.5, help="Seconds between /cvs/tasks polls")
+    parser.add_argument("--task-timeout", type=float, default=600.0, help="Max seconds per upload until done")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -8,19 +8,108 @@ DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./data/smarttender.db")
 EMBEDDINGS_PATH = os.getenv("EMBEDDINGS_PATH", "./data/embeddings/")
 CVS_PATH = os.getenv("CVS_PATH", "./data/cvs/")
 
+# ── FAISS index registry ────────────────────────────────────────────────────────
+INDEX_CACHE_MAX_MB           = int(os.getenv("INDEX_CACHE_MAX_MB", "512"))              # RAM budget for resident job indexes
+INDEX_FLUSH_INTERVAL_SECONDS = float(os.getenv("INDEX_FLUSH_INTERVAL_SECONDS", "2.0"))  # Write-behind delay
+
+# Index tier: every index starts exact ("flat") and is rebuilt as ANN_INDEX_TYPE
+# ("flat" | "hnsw" | "ivfpq") once it holds ANN_PROMOTION_THRESHOLD vectors
+ANN_INDEX_TYPE          = os.getenv("ANN_INDEX_TYPE", "hnsw")
+ANN_PROMOTION_THRESHOLD = int(os.getenv("ANN_PROMOTION_THRESHOLD", "5000"))
+HNSW_M                  = int(os.getenv("HNSW_M", "32"))
+HNSW_EF_CONSTRUCTION    = int(os.getenv("HNSW_EF_CONSTRUCTION", "80"))
+HNSW_EF_SEARCH          = int(os.getenv("HNSW_EF_SEARCH", "128"))
+IVF_NLIST               = int(os.getenv("IVF_NLIST", "0"))            # 0 = auto (≈ 4·√n)
+IVF_NPROBE              = int(os.getenv("IVF_NPROBE", "16"))
+IVF_PQ_M                = int(os.getenv("IVF_PQ_M", "64"))            # Sub-quantizers, must divide the dim
+IVF_RETRAIN_GROWTH      = float(os.getenv("IVF_RETRAIN_GROWTH", "2.0"))  # Retrain when n grows by this factor
+ANN_COMPACT_FRACTION    = float(os.getenv("ANN_COMPACT_FRACTION", "0.1"))  # Rebuild once this share of vectors is deleted
+
 # ── Tender Detection ────────────────────────────────────────────────────────────
 COMPANY_PROFILE_PATH = os.getenv("COMPANY_PROFILE_PATH", "./data/company_data.json")
 TENDERS_CSV_PATH     = os.getenv("TENDERS_CSV_PATH",     "./data/tenders.csv")
-TENDER_EMBEDDING_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+TENDER_EMBEDDING_MODEL = os.getenv("TENDER_EMBEDDING_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
 
 # ── CV Matching AI Models ───────────────────────────────────────────────────────
 EMBEDDING_MODEL  = "BAAI/bge-m3"
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "16"))
+
+# Multi-vector CV embeddings: one vector per overlapping passage instead of
+# one per CV, so late sections are not lost to bge-m3 truncation
+EMBEDDING_CHUNKING  = os.getenv("EMBEDDING_CHUNKING", "false").lower() == "true"
+CHUNK_SIZE_WORDS    = int(os.getenv("CHUNK_SIZE_WORDS", "200"))
+CHUNK_OVERLAP_WORDS = int(os.getenv("CHUNK_OVERLAP_WORDS", "50"))
+MAX_CHUNKS_PER_CV   = int(os.getenv("MAX_CHUNKS_PER_CV", "32"))
+CHUNK_AGGREGATION   = os.getenv("CHUNK_AGGREGATION", "max")   # "max" or "mean_top_n"
+CHUNK_TOP_N         = int(os.getenv("CHUNK_TOP_N", "3"))       # used by mean_top_n
 RERANKER_MODEL   = "cross-encoder/ms-marco-MiniLM-L-6-v2"
 GROQ_MODEL       = "llama-3.1-8b-instant"
 
+# Rerank only the CV passages (chunk_text windows) closest to the requirements
+# instead of the whole CV, which the cross-encoder would cut at 512 tokens.
+# A CV's reranker score is its best passage score.
+RERANK_PASSAGE_SELECTION = os.getenv("RERANK_PASSAGE_SELECTION", "true").lower() == "true"
+RERANK_MAX_PASSAGES      = int(os.getenv("RERANK_MAX_PASSAGES", "3"))   # Passages kept per CV
+
+# CV skill extraction at upload: "llm" (Groq), "lexical" (local dictionary
+# matcher over SYNONYM_MAP + SKILL_ALIASES) or "hybrid" (dictionary first,
+# Groq only when it finds fewer than LEXICAL_MIN_SKILLS specific skills)
+SKILL_EXTRACTION_MODE = os.getenv("SKILL_EXTRACTION_MODE", "llm")
+LEXICAL_MIN_SKILLS    = int(os.getenv("LEXICAL_MIN_SKILLS", "8"))
+
+# Judge 3 skill matching: "lexical" (exact / substring / word overlap / synonym
+# map), "semantic" (embedding similarity of the signals) or "hybrid" (either)
+SKILL_MATCHING_MODE      = os.getenv("SKILL_MATCHING_MODE", "lexical")
+SEMANTIC_SKILL_THRESHOLD = float(os.getenv("SEMANTIC_SKILL_THRESHOLD", "0.75"))  # Cosine for a signal match
+
+# ── Groq concurrency ────────────────────────────────────────────────────────────
+GROQ_MAX_CONCURRENCY      = int(os.getenv("GROQ_MAX_CONCURRENCY", "8"))           # Parallel LLM calls per process
+GROQ_MAX_RETRIES          = int(os.getenv("GROQ_MAX_RETRIES", "4"))               # Retries on rate limit / transient errors
+GROQ_BACKOFF_BASE_SECONDS = float(os.getenv("GROQ_BACKOFF_BASE_SECONDS", "1.0"))  # Doubles after every retry
+
+# ── Worker pools (keep blocking work off the event loop) ────────────────────────
+PDF_WORKERS       = int(os.getenv("PDF_WORKERS", "2"))        # Processes for pdfplumber parsing
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", "2"))  # Threads for model inference
+IO_WORKERS        = int(os.getenv("IO_WORKERS", "8"))         # Threads for SQLite / disk I/O
+
+# ── Background CV ingestion queue ───────────────────────────────────────────────
+INGESTION_WORKERS      = int(os.getenv("INGESTION_WORKERS", "2"))          # CVs processed in parallel
+INGESTION_POLL_SECONDS = float(os.getenv("INGESTION_POLL_SECONDS", "2.0"))  # Idle worker re-check interval
+
+# ── Caches ──────────────────────────────────────────────────────────────────────
+REQUIREMENTS_CACHE_MAX_ENTRIES = int(os.getenv("REQUIREMENTS_CACHE_MAX_ENTRIES", "1000"))
+RERANKER_CACHE_MAX_ENTRIES     = int(os.getenv("RERANKER_CACHE_MAX_ENTRIES", "50000"))  # Raw logits per (requirements, CV)
+PASSAGE_CACHE_MAX_ENTRIES      = int(os.getenv("PASSAGE_CACHE_MAX_ENTRIES", "10000"))   # Passage vectors per CV text, for reranking
+PHRASE_MEMORY_MAX_ENTRIES      = int(os.getenv("PHRASE_MEMORY_MAX_ENTRIES", "50000"))   # Skill phrase vectors kept in RAM
+PHRASE_CACHE_MAX_ENTRIES       = int(os.getenv("PHRASE_CACHE_MAX_ENTRIES", "200000"))   # ...and in SQLite
+CACHE_TOUCH_INTERVAL_SECONDS   = float(os.getenv("CACHE_TOUCH_INTERVAL_SECONDS", "300"))  # A hit rewrites last_used_at at most this often
+SQLITE_BUSY_TIMEOUT_SECONDS    = float(os.getenv("SQLITE_BUSY_TIMEOUT_SECONDS", "30"))    # Writers wait this long for the lock
+
+# ── Model loading ───────────────────────────────────────────────────────────────
+# Models load lazily on first use; list names here ("embedding,reranker,tender")
+# to load them in the background right after startup instead
+MODEL_WARMUP = [m.strip() for m in os.getenv("MODEL_WARMUP", "").split(",") if m.strip()]
+MODEL_DEVICE        = os.getenv("MODEL_DEVICE") or None                # "cpu", "cuda", "mps"; unset = auto
+MODEL_TORCH_THREADS = int(os.getenv("MODEL_TORCH_THREADS", "0"))       # torch threads per process; 0 = torch default
+
+# Inference backend: "torch" (fp32 PyTorch), "onnx" (ONNX Runtime) or "onnx-int8"
+# (ONNX with int8 dynamic quantization, exported once into ONNX_MODELS_PATH).
+# Check accuracy with benchmarks/inference_benchmark.py before switching.
+INFERENCE_BACKEND        = os.getenv("INFERENCE_BACKEND", "torch")
+EMBEDDING_BACKEND        = os.getenv("EMBEDDING_BACKEND", INFERENCE_BACKEND)
+RERANKER_BACKEND         = os.getenv("RERANKER_BACKEND", INFERENCE_BACKEND)
+TENDER_BACKEND           = os.getenv("TENDER_BACKEND", INFERENCE_BACKEND)
+ONNX_MODELS_PATH         = os.getenv("ONNX_MODELS_PATH", "./data/onnx_models")
+ONNX_QUANTIZATION_CONFIG = os.getenv("ONNX_QUANTIZATION_CONFIG", "avx512_vnni")  # "arm64", "avx2", "avx512" or "avx512_vnni"
+
 # ── Matching config ─────────────────────────────────────────────────────────────
 TOP_K_EMBEDDING = 20      # How many CVs to keep after Judge 1
 TOP_K_FINAL     = 10      # How many CVs to show in final results
+TOP_NEAR_MISSES = 5       # How many near misses to show
+
+# Cancel queued LLM profiling calls of candidates whose best possible final score
+# (skill = 1.0) cannot reach MINIMUM_SCORE_THRESHOLD / the top TOP_K_FINAL or the near misses
+MATCH_CASCADE = os.getenv("MATCH_CASCADE", "true").lower() == "true"
 
 # Weights for final score
 WEIGHT_EMBEDDING = 0.25
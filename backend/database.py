@@ -1,13 +1,28 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime
+from sqlalchemy import (
+    create_engine, event, inspect, text, Column, Integer, String, Text, DateTime, Date, Float, Boolean, LargeBinary
+)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
-from config import DATABASE_URL
+from config import DATABASE_URL, SQLITE_BUSY_TIMEOUT_SECONDS
 import os
 
 os.makedirs("./data", exist_ok=True)
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+engine = create_engine(
+    DATABASE_URL,
+    connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_SECONDS}
+)
+
+
+@event.listens_for(engine, "connect")
+def _enable_wal(dbapi_connection, _):
+    # Readers no longer wait for the writer (API, ingestion workers, Groq and
+    # IO pools all share this file); writers queue for up to the busy timeout
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.close()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -22,10 +37,101 @@ class CV(Base):
     raw_text = Column(Text, nullable=False)
     skills = Column(Text, nullable=True)
     uploaded_at = Column(DateTime, default=datetime.utcnow)
+    candidate_id = Column(Integer, nullable=True, index=True)  # -> candidates.id
+
+
+class Candidate(Base):
+    """Deduplicated talent pool: one row per distinct PDF, shared by every job it is uploaded to."""
+    __tablename__ = "candidates"
+
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String, nullable=False, unique=True, index=True)  # sha256 of the PDF bytes
+    filename = Column(String, nullable=False)
+    candidate_name = Column(String, nullable=True)
+    raw_text = Column(Text, nullable=False)
+    skills = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class IngestionTask(Base):
+    """Queued /cvs/upload work, processed by services/ingestion.py workers."""
+    __tablename__ = "ingestion_tasks"
+
+    id = Column(String, primary_key=True)  # uuid4 hex
+    job_id = Column(Integer, nullable=False, index=True)
+    filename = Column(String, nullable=False)
+    file_path = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="queued", index=True)  # queued / running / done / failed / cancelled
+    error = Column(Text, nullable=True)
+    cv_id = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class CVProfile(Base):
+    """LLM-extracted CV profile, keyed by hash(raw_text + model + prompt version)."""
+    __tablename__ = "cv_profiles"
+
+    profile_key = Column(String, primary_key=True)
+    profile = Column(Text, nullable=False)  # JSON from extract_cv_profile()
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class CacheEntry(Base):
+    """Generic persistent cache row, see services/cache.py."""
+    __tablename__ = "cache_entries"
+
+    namespace = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)
+    value = Column(LargeBinary, nullable=False)
+    last_used_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class Tender(Base):
+    """Public tender upserted from tenders.csv, scored against the company profile, see services/tender_store.py."""
+    __tablename__ = "tenders"
+
+    id = Column(Integer, primary_key=True, index=True)
+    tender_key = Column(String, nullable=False, unique=True, index=True)  # sha256 of authority + title + publication date
+    issuing_authority = Column(Text, nullable=False)
+    title = Column(Text, nullable=False)
+    project_description = Column(Text, nullable=False)
+    required_skills = Column(Text, nullable=False)  # JSON list, display form
+    publication_date = Column(String, nullable=True)
+    submission_deadline = Column(String, nullable=True)
+    deadline = Column(Date, nullable=True, index=True)  # parsed submission_deadline
+    contract_duration_months = Column(Integer, nullable=True, index=True)
+    budget_currency = Column(String, nullable=True)
+    budget_min = Column(Integer, nullable=True, index=True)
+    budget_max = Column(Integer, nullable=True, index=True)
+    tender_text = Column(Text, nullable=False)
+    matching_text = Column(Text, nullable=True)  # tender_matching_text(): what excluded domains are matched against
+    text_key = Column(String, nullable=False)  # tender_text_key(tender_text); embedding is stale when it changes
+    embedding = Column(LargeBinary, nullable=True)  # float32 normalized vector
+    semantic_score = Column(Float, nullable=True, index=True)
+    semantic_similarity = Column(Float, nullable=True)
+    is_excluded = Column(Boolean, nullable=False, default=False, index=True)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+# Columns added after a table was first created: create_all() does not alter
+# existing tables, so they are added here.
+_ADDED_COLUMNS = {
+    "cvs": {"candidate_id": "INTEGER"},
+    "tenders": {"matching_text": "TEXT"},
+}
 
 
 def create_tables():
     Base.metadata.create_all(bind=engine)
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table, columns in _ADDED_COLUMNS.items():
+            existing = {c["name"] for c in inspector.get_columns(table)}
+            for name, sql_type in columns.items():
+                if name not in existing:
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {sql_type}"))
 
 
 def get_db():
@@ -1,6 +1,9 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from database import create_tables
+from services.ingestion import start_ingestion_workers
+from services.model_provider import models_status, warm_up_models
+from config import MODEL_WARMUP
 
 from routers import cvs, matching, tenders
 from fastapi import Depends
@@ -27,6 +30,13 @@ app.add_middleware(
 # Create DB tables on startup
 create_tables()
 
+
+@app.on_event("startup")
+def start_background_workers():
+    start_ingestion_workers()
+    warm_up_models(MODEL_WARMUP)
+
+
 # ── Register routers ────────────────────────────────────────────────────────────
 app.include_router(cvs.router)
 app.include_router(matching.router)
@@ -43,6 +53,14 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/ready", tags=["Health"])
+def ready():
+    """Per-model load state; ready once every warm-up model has loaded."""
+    models = models_status()
+    is_ready = all(models.get(name, {}).get("state") == "ready" for name in MODEL_WARMUP)
+    return {"ready": is_ready, "models": models}
+
+
 @app.delete("/jobs/{job_id}", tags=["CVs"])
 def delete_job(job_id: int, db: Session = Depends(get_db)):
     """Called when admin deletes a job from frontend — cleans CVs + FAISS index."""
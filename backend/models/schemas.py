@@ -19,9 +19,37 @@ class CVResponse(BaseModel):
         from_attributes = True
 
 
+class IngestionTaskResponse(BaseModel):
+    task_id: str
+    job_id: int
+    filename: str
+    status: str                       # queued / running / done / failed / cancelled
+    error: Optional[str] = None
+    cv: Optional[CVResponse] = None   # set once status == "done"
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+
+class SkippedUpload(BaseModel):
+    filename: str
+    reason: str
+
+
+class BatchUploadResponse(BaseModel):
+    uploaded: List[CVResponse]
+    skipped: List[SkippedUpload]
+
+
 class MatchRequest(BaseModel):
     requirements: str
     job_id: int
+    use_cache: bool = True   # False forces a fresh requirements profile
+
+
+class GlobalMatchRequest(BaseModel):
+    requirements: str
+    job_ids: Optional[List[int]] = None   # restrict the talent pool to these jobs
+    use_cache: bool = True
 
 
 class CandidateMatch(BaseModel):
@@ -35,10 +63,12 @@ class CandidateMatch(BaseModel):
     match_tier: str
     matched_skills: List[str]
     missing_skills: List[str]
+    candidate_id: Optional[int] = None   # talent pool id (same person across jobs)
 
 
 class NearMissCandidate(BaseModel):
     cv_id: int
+    candidate_id: Optional[int] = None
     filename: str
     candidate_name: Optional[str]
     their_domain: str
@@ -56,6 +86,21 @@ class MatchResponse(BaseModel):
     explanation: Optional[str] = None
     near_misses: Optional[List[NearMissCandidate]] = None
     suggestions: Optional[List[str]] = None
+    llm_calls_saved: int = 0   # CV profilings skipped by the early-exit cascade
+
+
+class BatchMatchRequest(BaseModel):
+    requests: List[MatchRequest]
+
+
+class BatchMatchResult(BaseModel):
+    job_id: int
+    response: Optional[MatchResponse] = None
+    error: Optional[str] = None   # set instead of response when the job cannot be matched
+
+
+class BatchMatchResponse(BaseModel):
+    results: List[BatchMatchResult]   # same order as the requests
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -86,6 +131,7 @@ class TenderDetectRequest(BaseModel):
     min_score: Optional[float] = 0.0
     include_excluded: Optional[bool] = False
     keyword: Optional[str] = None   # optional free-text filter on title/description
+    offset: Optional[int] = 0       # skip this many matches (pagination)
 
 
 class TenderDetectResponse(BaseModel):
@@ -121,4 +167,15 @@ class TenderStatsResponse(BaseModel):
     excluded_count: int
     eligible_count: int
     score_buckets: dict   # e.g. {"high": 12, "medium": 30, "low": 58}
-    upcoming_deadlines: int   # tenders with deadline in next 30 days
\ No newline at end of file
+    upcoming_deadlines: int   # tenders with deadline in next 30 days
+
+
+class TenderReloadResponse(BaseModel):
+    """Result of /tenders/reload: only new or changed tenders are encoded."""
+    total_tenders: int
+    inserted: int = 0
+    updated: int = 0
+    removed: int = 0
+    encoded: int
+    reused: int
+    seconds: float
@@ -1,32 +1,76 @@
 from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Form
 from sqlalchemy.orm import Session
-import os, json, shutil
+from typing import List
+from datetime import datetime
+import asyncio, io, os, json, zipfile
 
-from database import get_db, CV
-from models.schemas import CVResponse
+from database import get_db, CV, IngestionTask
+from models.schemas import CVResponse, BatchUploadResponse, SkippedUpload, IngestionTaskResponse
 from services.parser import extract_text_from_pdf, extract_candidate_name, clean_text
-from services.skill_extractor import extract_skills_from_text
-from services.embedder import add_cv_to_index, delete_index
+from services.skill_extractor import groq_executor, extract_skills_from_text, extract_cv_profile
+from services.profile_store import store_cv_profiles
+from services.embedder import add_cvs_to_index, remove_cv_from_index, delete_index
+from services.ingestion import enqueue_cv, has_pending_task, job_lock
+from services.talent_pool import pdf_content_hash, find_candidates, create_candidates
+from services.workers import run_in, pdf_executor, embedding_executor, io_executor
 from config import CVS_PATH
 
 os.makedirs(CVS_PATH, exist_ok=True)
 router = APIRouter(prefix="/cvs", tags=["CVs"])
 
 
-@router.post("/upload", response_model=CVResponse)
+def _find_existing_cv(db: Session, job_id: int, filename: str):
+    return db.query(CV).filter(
+        CV.filename == filename,
+        CV.job_id == job_id
+    ).first() or has_pending_task(db, job_id, filename)
+
+
+def _write_file(file_path: str, content: bytes):
+    with open(file_path, "wb") as f:
+        f.write(content)
+
+
+def _task_to_response(db: Session, task: IngestionTask) -> IngestionTaskResponse:
+    cv_response = None
+    if task.cv_id is not None:
+        cv = db.query(CV).filter(CV.id == task.cv_id).first()
+        if cv:
+            cv_response = CVResponse(
+                id=cv.id,
+                job_id=cv.job_id,
+                filename=cv.filename,
+                candidate_name=cv.candidate_name,
+                skills=json.loads(cv.skills) if cv.skills else [],
+                uploaded_at=cv.uploaded_at
+            )
+    return IngestionTaskResponse(
+        task_id=task.id,
+        job_id=task.job_id,
+        filename=task.filename,
+        status=task.status,
+        error=task.error,
+        cv=cv_response,
+        created_at=task.created_at,
+        finished_at=task.finished_at
+    )
+
+
+@router.post("/upload", response_model=IngestionTaskResponse, status_code=202)
 async def upload_cv(
     file: UploadFile = File(...),
     job_id: int = Form(...),
     db: Session = Depends(get_db)
 ):
+    """
+    Store the PDF and enqueue it for background ingestion.
+    Returns immediately with a task id — poll /cvs/tasks/{task_id}.
+    """
     if not file.filename.endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF files are accepted")
 
     # Unique per job — same file allowed in different jobs
-    existing = db.query(CV).filter(
-        CV.filename == file.filename,
-        CV.job_id == job_id
-    ).first()
+    existing = await run_in(io_executor, _find_existing_cv, db, job_id, file.filename)
     if existing:
         raise HTTPException(
             status_code=400,
@@ -36,43 +80,193 @@ async def upload_cv(
     # Save PDF with job prefix to avoid file conflicts
     safe_filename = f"job{job_id}_{file.filename}"
     file_path = os.path.join(CVS_PATH, safe_filename)
-    with open(file_path, "wb") as f:
-        shutil.copyfileobj(file.file, f)
+    content = await file.read()
+    await run_in(io_executor, _write_file, file_path, content)
 
-    # Extract text
-    raw_text = extract_text_from_pdf(file_path)
-    if not raw_text.strip():
-        raise HTTPException(
-            status_code=400,
-            detail="Could not extract text from this PDF"
-        )
+    task = await run_in(io_executor, enqueue_cv, db, job_id, file.filename, file_path)
+    return _task_to_response(db, task)
 
-    candidate_name = extract_candidate_name(raw_text)
-    raw_text = clean_text(raw_text)
-    skills = extract_skills_from_text(raw_text)
-
-    # Save to DB
-    cv = CV(
-        job_id=job_id,
-        filename=file.filename,
-        candidate_name=candidate_name,
-        raw_text=raw_text,
-        skills=json.dumps(skills)
-    )
-    db.add(cv)
+
+@router.get("/tasks/{task_id}", response_model=IngestionTaskResponse)
+def get_ingestion_task(task_id: str, db: Session = Depends(get_db)):
+    task = db.query(IngestionTask).filter(IngestionTask.id == task_id).first()
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return _task_to_response(db, task)
+
+
+def _unzip_pdfs(content: bytes) -> list[tuple[str, bytes]]:
+    with zipfile.ZipFile(io.BytesIO(content)) as archive:
+        return [
+            (os.path.basename(name), archive.read(name))
+            for name in archive.namelist()
+            if name.lower().endswith(".pdf") and not name.startswith("__MACOSX/")
+        ]
+
+
+def _existing_filenames(db: Session, job_id: int) -> set[str]:
+    uploaded = {row.filename for row in db.query(CV.filename).filter(CV.job_id == job_id).all()}
+    pending = {
+        row.filename for row in db.query(IngestionTask.filename).filter(
+            IngestionTask.job_id == job_id,
+            IngestionTask.status.in_(["queued", "running"])
+        ).all()
+    }
+    return uploaded | pending
+
+
+def _parse_pdf_safe(file_path: str) -> str:
+    try:
+        return extract_text_from_pdf(file_path)
+    except Exception as e:
+        print(f"[UPLOAD] Could not parse {file_path}: {type(e).__name__}: {e}")
+        return ""
+
+
+def _save_cvs(db: Session, job_id: int, rows: list[dict]) -> list[CV]:
+    """Insert all rows in a single transaction."""
+    cvs = [
+        CV(
+            job_id=job_id,
+            filename=row["filename"],
+            candidate_name=row["candidate"].candidate_name,
+            raw_text=row["candidate"].raw_text,
+            skills=row["candidate"].skills,
+            candidate_id=row["candidate"].id
+        )
+        for row in rows
+    ]
+    db.add_all(cvs)
     db.commit()
-    db.refresh(cv)
-
-    # Add to job-specific FAISS index
-    add_cv_to_index(job_id, cv.id, raw_text)
-
-    return CVResponse(
-        id=cv.id,
-        job_id=cv.job_id,
-        filename=cv.filename,
-        candidate_name=cv.candidate_name,
-        skills=skills,
-        uploaded_at=cv.uploaded_at
+    for cv in cvs:
+        db.refresh(cv)
+    return cvs
+
+
+def _save_and_index_cvs(db: Session, job_id: int, rows: list[dict]) -> list[CV]:
+    """
+    Insert the rows, then index them with one batched encode (new
+    candidates only) and one index write. Runs under the job's ingestion
+    lock, so a concurrent DELETE /cvs/job/{job_id} cannot be undone.
+    """
+    with job_lock(job_id):
+        cvs = _save_cvs(db, job_id, rows)
+        items = [(cv.id, cv.candidate_id, cv.raw_text) for cv in cvs]
+        embedding_executor.submit(add_cvs_to_index, job_id, items).result()
+    return cvs
+
+
+@router.post("/upload-batch", response_model=BatchUploadResponse)
+async def upload_cv_batch(
+    files: List[UploadFile] = File(...),
+    job_id: int = Form(...),
+    db: Session = Depends(get_db)
+):
+    """
+    Upload many PDFs (or .zip archives of PDFs) for one job.
+    PDFs new to the talent pool are parsed in parallel and their
+    skills/profiles extracted concurrently; known PDFs reuse their
+    candidate. Rows are inserted in one transaction, new texts embedded
+    in one batch and the job index written once.
+    """
+    skipped: list[SkippedUpload] = []
+
+    # Collect (filename, bytes) — zips are expanded in the I/O pool
+    incoming: list[tuple[str, bytes]] = []
+    for file in files:
+        content = await file.read()
+        name = file.filename or ""
+        if name.lower().endswith(".zip"):
+            try:
+                incoming += await run_in(io_executor, _unzip_pdfs, content)
+            except zipfile.BadZipFile:
+                skipped.append(SkippedUpload(filename=name, reason="Invalid zip archive"))
+        elif name.endswith(".pdf"):
+            incoming.append((name, content))
+        else:
+            skipped.append(SkippedUpload(filename=name, reason="Only PDF files are accepted"))
+
+    # Unique per job — and unique within the batch
+    seen = await run_in(io_executor, _existing_filenames, db, job_id)
+    pdfs: list[tuple[str, bytes]] = []
+    for name, content in incoming:
+        if name in seen:
+            skipped.append(SkippedUpload(filename=name, reason="This CV is already uploaded for this job"))
+            continue
+        seen.add(name)
+        pdfs.append((name, content))
+
+    if not pdfs:
+        return BatchUploadResponse(uploaded=[], skipped=skipped)
+
+    # Save PDFs with job prefix
+    paths = [os.path.join(CVS_PATH, f"job{job_id}_{name}") for name, _ in pdfs]
+    await asyncio.gather(*[
+        run_in(io_executor, _write_file, path, content)
+        for path, (_, content) in zip(paths, pdfs)
+    ])
+
+    # Only PDFs the talent pool has never seen are parsed (in parallel)
+    hashes = [pdf_content_hash(content) for _, content in pdfs]
+    known = await run_in(io_executor, find_candidates, db, hashes)
+    fresh: dict[str, int] = {}
+    for i, content_hash in enumerate(hashes):
+        if content_hash not in known and content_hash not in fresh:
+            fresh[content_hash] = i
+    texts = await asyncio.gather(*[
+        run_in(pdf_executor, _parse_pdf_safe, paths[i]) for i in fresh.values()
+    ])
+
+    new_rows = []
+    for (content_hash, i), raw_text in zip(fresh.items(), texts):
+        if raw_text.strip():
+            new_rows.append({
+                "content_hash": content_hash,
+                "filename": pdfs[i][0],
+                "candidate_name": extract_candidate_name(raw_text),
+                "raw_text": clean_text(raw_text)
+            })
+
+    if new_rows:
+        # Skills + profiles for every new CV fan out on the Groq pool together
+        raw_texts = [row["raw_text"] for row in new_rows]
+        skill_futures = [asyncio.wrap_future(groq_executor.submit(extract_skills_from_text, t)) for t in raw_texts]
+        profile_futures = [asyncio.wrap_future(groq_executor.submit(extract_cv_profile, t)) for t in raw_texts]
+        for row, skills in zip(new_rows, await asyncio.gather(*skill_futures)):
+            row["skills_json"] = json.dumps(skills)
+        known.update(await run_in(io_executor, create_candidates, db, new_rows))
+        profiles = await asyncio.gather(*profile_futures)
+        await run_in(io_executor, store_cv_profiles, db, raw_texts, profiles)
+
+    rows = []
+    for (name, _), path, content_hash in zip(pdfs, paths, hashes):
+        if content_hash not in known:
+            skipped.append(SkippedUpload(filename=name, reason="Could not extract text from this PDF"))
+            if os.path.exists(path):
+                os.remove(path)
+            continue
+        rows.append({"filename": name, "candidate": known[content_hash]})
+
+    if not rows:
+        return BatchUploadResponse(uploaded=[], skipped=skipped)
+
+    cvs = await run_in(io_executor, _save_and_index_cvs, db, job_id, rows)
+    print(f"[UPLOAD] Batch for job {job_id}: {len(cvs)} uploaded "
+          f"({len(new_rows)} new to the talent pool), {len(skipped)} skipped")
+
+    return BatchUploadResponse(
+        uploaded=[
+            CVResponse(
+                id=cv.id,
+                job_id=cv.job_id,
+                filename=cv.filename,
+                candidate_name=cv.candidate_name,
+                skills=json.loads(cv.skills) if cv.skills else [],
+                uploaded_at=cv.uploaded_at
+            )
+            for cv in cvs
+        ],
+        skipped=skipped
     )
 
 
@@ -95,20 +289,43 @@ def get_cvs_by_job(job_id: int, db: Session = Depends(get_db)):
 @router.delete("/job/{job_id}")
 def delete_job_cvs(job_id: int, db: Session = Depends(get_db)):
     """Delete ALL CVs and index for a specific job"""
-    cvs = db.query(CV).filter(CV.job_id == job_id).all()
+    # Held until the index is gone: a running ingestion task cannot insert
+    # its CV or touch the index in between, and sees its cancellation after
+    with job_lock(job_id):
+        cvs = db.query(CV).filter(CV.job_id == job_id).all()
 
-    # Delete PDF files from disk
-    for cv in cvs:
-        file_path = os.path.join(CVS_PATH, f"job{job_id}_{cv.filename}")
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        # Delete PDF files from disk
+        for cv in cvs:
+            file_path = os.path.join(CVS_PATH, f"job{job_id}_{cv.filename}")
+            if os.path.exists(file_path):
+                os.remove(file_path)
 
-    # Delete from DB
-    db.query(CV).filter(CV.job_id == job_id).delete()
-    db.commit()
+        # Queued uploads are dropped with their stored PDFs, running ones cancelled
+        queued = db.query(IngestionTask.file_path).filter(
+            IngestionTask.job_id == job_id,
+            IngestionTask.status == "queued"
+        ).all()
+        for row in queued:
+            try:
+                os.remove(row.file_path)
+            except FileNotFoundError:
+                pass
+
+        # Delete from DB
+        db.query(CV).filter(CV.job_id == job_id).delete()
+        db.query(IngestionTask).filter(
+            IngestionTask.job_id == job_id,
+            IngestionTask.status == "queued"
+        ).delete(synchronize_session=False)
+        db.query(IngestionTask).filter(
+            IngestionTask.job_id == job_id,
+            IngestionTask.status == "running"
+        ).update({"status": "cancelled", "finished_at": datetime.utcnow()},
+                 synchronize_session=False)
+        db.commit()
 
-    # Delete FAISS index for this job
-    delete_index(job_id)
+        # Delete FAISS index for this job
+        delete_index(job_id)
 
     return {"message": f"All CVs for job {job_id} deleted successfully"}
 
@@ -123,6 +340,10 @@ def delete_single_cv(cv_id: int, db: Session = Depends(get_db)):
     if os.path.exists(file_path):
         os.remove(file_path)
 
+    job_id = cv.job_id
     db.delete(cv)
     db.commit()
+
+    # Drop its vectors from the job index
+    remove_cv_from_index(job_id, cv_id)
     return {"message": f"CV {cv_id} deleted"}
\ No newline at end of file
@@ -1,27 +1,36 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from collections import Counter
 import json
 
-from database import get_db, CV
+from database import get_db, SessionLocal, CV
 from models.schemas import (
-    MatchRequest, MatchResponse,
-    CandidateMatch, NearMissCandidate
+    MatchRequest, GlobalMatchRequest, MatchResponse,
+    CandidateMatch, NearMissCandidate,
+    BatchMatchRequest, BatchMatchResult, BatchMatchResponse
 )
-from services.embedder import search_similar_cvs
-from services.reranker import rerank_candidates
+from services.embedder import search_similar_cvs, search_similar_cvs_batch, search_talent_pool
+from services.reranker import rerank_candidates, rerank_batch, logit_cache
 from services.skill_extractor import (
+    groq_executor,
+    requirements_cache,
     extract_requirements_profile,
-    extract_cv_profile,
     compute_full_profile_score
 )
+from services.profile_store import get_cv_profiles, iter_cv_profiles, stored_cv_profiles
 from config import (
     TOP_K_EMBEDDING,
     TOP_K_FINAL,
+    TOP_NEAR_MISSES,
+    MATCH_CASCADE,
     WEIGHT_EMBEDDING,
     WEIGHT_RERANKER,
     WEIGHT_SKILL,
-    MINIMUM_SCORE_THRESHOLD
+    MINIMUM_SCORE_THRESHOLD,
+    SKILL_MATCHING_MODE
 )
 
 router = APIRouter(prefix="/match", tags=["Matching"])
@@ -138,6 +147,7 @@ def build_near_miss(
     )
     return NearMissCandidate(
         cv_id=candidate["cv_id"],
+        candidate_id=candidate.get("candidate_id"),
         filename=candidate["filename"],
         candidate_name=candidate["candidate_name"],
         their_domain=their_domain,
@@ -149,9 +159,304 @@ def build_near_miss(
     )
 
 
-@router.post("/", response_model=MatchResponse)
-def match_cvs(request: MatchRequest, db: Session = Depends(get_db)):
+def _rerank_stage(requirements: str, candidates: list[dict], use_cache: bool) -> list[dict]:
+    """Judge 2: cross-encoder reranking."""
+    print(f"\n[JUDGE 2] Running reranker on {len(candidates)} candidates...")
+    candidates = rerank_candidates(requirements, candidates, use_cache)
+    for c in candidates:
+        print(f"  → {c['candidate_name']} | reranker: {c['reranker_score']}")
+    return candidates
+
+
+def _score_candidate(
+    candidate: dict,
+    cv_profile: dict,
+    req_profile: dict
+) -> tuple[float, CandidateMatch | None, NearMissCandidate | None]:
+    """Judge 3 for one candidate → (final_score, match or None, near miss or None)."""
+    print(f"\n  Analyzing: {candidate['candidate_name']}...")
+
+    skill_score, matched, missing = compute_full_profile_score(
+        cv_profile, req_profile
+    )
+
+    final_score = round(
+        WEIGHT_EMBEDDING * candidate["embedding_score"] +
+        WEIGHT_RERANKER * candidate["reranker_score"] +
+        WEIGHT_SKILL * skill_score,
+        4
+    )
+
+    print(f"  Embedding: {candidate['embedding_score']} | "
+          f"Reranker: {candidate['reranker_score']} | "
+          f"Skill: {skill_score} | Final: {final_score}")
+
+    passes = skill_score > 0.0 and final_score >= MINIMUM_SCORE_THRESHOLD
+
+    if passes:
+        return final_score, CandidateMatch(
+            cv_id=candidate["cv_id"],
+            filename=candidate["filename"],
+            candidate_name=candidate["candidate_name"],
+            final_score=final_score,
+            embedding_score=candidate["embedding_score"],
+            reranker_score=candidate["reranker_score"],
+            skill_score=round(skill_score, 4),
+            match_tier=get_match_tier(final_score),
+            matched_skills=matched,
+            missing_skills=missing,
+            candidate_id=candidate.get("candidate_id")
+        ), None
+    return final_score, None, build_near_miss(
+        candidate, cv_profile, req_profile, matched, missing
+    )
+
+
+def _finalize(
+    all_results: list[CandidateMatch],
+    all_near_misses: list[tuple[float, NearMissCandidate]],
+    req_profile: dict,
+    total_cvs: int
+) -> MatchResponse:
+    """Final ranking, near misses and suggestions."""
+    # Sort results by final score
+    all_results.sort(key=lambda x: x.final_score, reverse=True)
+
+    # ✅ Guarantee at least top 3 if they have any skill match
+    if len(all_results) < 3:
+        fallback = [
+            nm for score, nm in sorted(all_near_misses, key=lambda x: x[0], reverse=True)
+            if nm.cv_id not in {r.cv_id for r in all_results}
+        ]
+        for nm in fallback[:3 - len(all_results)]:
+            # Promote near miss to result with weak tier
+            all_results.append(CandidateMatch(
+                cv_id=nm.cv_id,
+                filename=nm.filename,
+                candidate_name=nm.candidate_name,
+                final_score=0.0,
+                embedding_score=0.0,
+                reranker_score=0.0,
+                skill_score=0.0,
+                match_tier="Weak Match",
+                matched_skills=nm.skills_they_have,
+                missing_skills=nm.skills_they_lack,
+                candidate_id=nm.candidate_id
+            ))
+
+    # Sort near misses and take top 5
+    all_near_misses.sort(key=lambda x: x[0], reverse=True)
+    top_near_misses = [nm for _, nm in all_near_misses[:TOP_NEAR_MISSES]]
+
+    # No matches at all
+    if not any(r.skill_score > 0 for r in all_results):
+        req_domain = req_profile.get("domain", "the required domain")
+        req_skills = req_profile.get("required_skills", [])
+        explanation = (
+            f"No candidates in the database match the requirements for '{req_domain}'. "
+            f"The tender requires expertise in: {', '.join(req_skills[:6])}. "
+            f"The {len(top_near_misses)} candidate(s) shown below are from different "
+            f"domains and lack the core required skills. "
+            f"Consider uploading CVs from professionals in {req_domain}."
+        )
+        print(f"\n[MATCHING] No matches. Showing {len(top_near_misses)} near misses.")
+        print(f"{'='*50}\n")
+        return MatchResponse(
+            total_cvs_scanned=total_cvs,
+            top_candidates=[],
+            match_found=False,
+            explanation=explanation,
+            near_misses=top_near_misses,
+            suggestions=build_suggestions([], top_near_misses, req_profile, total_cvs)
+        )
+
+    # Final result — only matched candidates (skill > 0)
+    final_results = [r for r in all_results if r.skill_score > 0.0]
+    final_results.sort(key=lambda x: x.final_score, reverse=True)
+
+    print(f"\n[MATCHING] {len(final_results)} match(es) found.")
+    if final_results:
+        print(f"Top: {final_results[0].candidate_name} — {final_results[0].final_score}")
+    print(f"{'='*50}\n")
+
+    return MatchResponse(
+        total_cvs_scanned=total_cvs,
+        top_candidates=final_results[:TOP_K_FINAL],
+        match_found=True,
+        explanation=None,
+        near_misses=top_near_misses if top_near_misses else None,
+        suggestions=build_suggestions(final_results[:TOP_K_FINAL], [], req_profile, total_cvs)
+    )
+
+
+def _score_bound(candidate: dict, skill_score: float) -> float:
+    """Final score the candidate would get with this skill score."""
+    return round(
+        WEIGHT_EMBEDDING * candidate["embedding_score"] +
+        WEIGHT_RERANKER * candidate["reranker_score"] +
+        WEIGHT_SKILL * skill_score,
+        4
+    )
+
+
+def _upper_bound(candidate: dict) -> float:
+    """Best reachable final score: a perfect skill score of 1.0."""
+    return _score_bound(candidate, 1.0)
+
+
+def _can_still_place(candidate: dict, scored) -> bool:
+    """
+    False only when profiling the candidate provably cannot change the
+    response: it can neither enter the top TOP_K_FINAL matches nor the
+    top TOP_NEAR_MISSES near misses, given the (final_score, match,
+    near_miss) results scored so far.
+    """
+    upper = _upper_bound(candidate)
+    lower = _score_bound(candidate, 0.0)
+    matches = sorted((s for s, match, _ in scored if match is not None), reverse=True)
+    near = sorted((s for s, match, _ in scored if match is None), reverse=True)
+
+    if upper >= MINIMUM_SCORE_THRESHOLD and (
+        len(matches) < TOP_K_FINAL or upper >= matches[TOP_K_FINAL - 1]
+    ):
+        return True
+    # A near miss has either no skill overlap (score = lower) or a score below the threshold
+    near_miss_bound = max(lower, min(upper, MINIMUM_SCORE_THRESHOLD))
+    return len(near) < TOP_NEAR_MISSES or near_miss_bound >= near[TOP_NEAR_MISSES - 1]
+
+
+def _judge_stream(
+    db: Session,
+    requirements: str,
+    candidates: list[dict],
+    total_cvs: int,
+    use_cache: bool
+):
+    """
+    Judges 2 and 3 + final ranking for the candidates retrieved by Judge 1,
+    as a stream of (event, payload): "reranked" once, "candidate" as each
+    profile completes, then "final" with the full MatchResponse.
+    """
+    candidates = _rerank_stage(requirements, candidates, use_cache)
+    yield "reranked", [
+        {
+            "cv_id": c["cv_id"],
+            "candidate_id": c.get("candidate_id"),
+            "candidate_name": c["candidate_name"],
+            "reranker_score": c["reranker_score"]
+        }
+        for c in candidates
+    ]
+
+    # --- JUDGE 3: Deep Profile Matching ---
+    # Requirements + every unprofiled candidate go to the Groq pool at once.
+    # Stored profiles are scored first; with the cascade, each result then
+    # cancels the queued calls of candidates that can no longer change the result.
+    print(f"\n[JUDGE 3] Profiling requirements + {len(candidates)} candidates...")
+    req_future = groq_executor.submit(
+        extract_requirements_profile, requirements, use_cache
+    )
+    texts = [c["raw_text"] for c in candidates]
+    cached = stored_cv_profiles(db, texts)
+    # Most promising first, so the calls left waiting in the pool are the prunable ones
+    pending = sorted(
+        (i for i in range(len(candidates)) if i not in cached),
+        key=lambda i: _upper_bound(candidates[i]),
+        reverse=True
+    )
+    scored = {}
+    skipped = []
+
+    def keep(j: int) -> bool:
+        return _can_still_place(candidates[pending[j]], scored.values())
+
+    fresh_profiles = iter_cv_profiles(
+        db, [texts[i] for i in pending], keep if MATCH_CASCADE else None
+    ) if pending else iter(())
+    req_profile = req_future.result()
+    print(f"  Domain: {req_profile.get('domain')}")
+    print(f"  Required skills: {req_profile.get('required_skills')}")
+
+    def score(i: int, cv_profile: dict):
+        final_score, match, near_miss = _score_candidate(candidates[i], cv_profile, req_profile)
+        scored[i] = (final_score, match, near_miss)
+        return "candidate", {
+            "rank": i,
+            "cv_id": candidates[i]["cv_id"],
+            "candidate_id": candidates[i].get("candidate_id"),
+            "final_score": final_score,
+            "match": match,
+            "near_miss": near_miss
+        }
+
+    for i, cv_profile in cached.items():
+        yield score(i, cv_profile)
+    for j, cv_profile in fresh_profiles:
+        if cv_profile is None:
+            skipped.append(pending[j])
+        else:
+            yield score(pending[j], cv_profile)
+
+    if skipped:
+        print(f"\n[CASCADE] Cancelled profiling of {len(skipped)} candidate(s) that cannot make the cut")
+
+    # Back to reranked order so ties rank the same as a non-streamed match
+    all_results, all_near_misses = [], []
+    for i in sorted(scored):
+        final_score, match, near_miss = scored[i]
+        if match is not None:
+            all_results.append(match)
+        else:
+            all_near_misses.append((final_score, near_miss))
+
+    response = _finalize(all_results, all_near_misses, req_profile, total_cvs)
+    response.llm_calls_saved = len(skipped)
+    yield "final", response
+
+
+def _judge_candidates(
+    db: Session,
+    requirements: str,
+    candidates: list[dict],
+    total_cvs: int,
+    use_cache: bool
+) -> MatchResponse:
+    """Run every stage to completion and return the final response."""
+    for event, payload in _judge_stream(db, requirements, candidates, total_cvs, use_cache):
+        if event == "final":
+            return payload
+
+
+def _sse(event: str, payload) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(payload))}\n\n"
+
+
+@router.get("/cache-stats")
+def cache_stats():
+    """Hit/miss counters for the requirements profile, reranker logit and phrase caches."""
+    stats = {
+        "requirements_profile": requirements_cache.stats(),
+        "reranker_logits": logit_cache.stats()
+    }
+    if SKILL_MATCHING_MODE in ("semantic", "hybrid"):
+        from services.phrase_store import phrase_store
+        stats["phrase_vectors"] = phrase_store.stats()
+    return stats
 
+
+def _no_candidates_response(total_cvs: int) -> MatchResponse:
+    return MatchResponse(
+        total_cvs_scanned=total_cvs,
+        top_candidates=[],
+        match_found=False,
+        explanation="No candidates found for these requirements.",
+        near_misses=[],
+        suggestions=[]
+    )
+
+
+def _validate_job_request(request: MatchRequest, db: Session) -> int:
+    """Reject empty requirements / jobs without CVs → total CVs in the job."""
     if not request.requirements.strip():
         raise HTTPException(
             status_code=400,
@@ -166,6 +471,13 @@ def match_cvs(request: MatchRequest, db: Session = Depends(get_db)):
             detail="No CVs uploaded for this job. Please upload CVs first."
         )
 
+    return total_cvs
+
+
+def _retrieve_job_candidates(request: MatchRequest, db: Session) -> tuple[list[dict], int]:
+    """Validation + Judge 1 for one job → (candidates, total CVs in the job)."""
+    total_cvs = _validate_job_request(request, db)
+
     print(f"\n{'='*50}")
     print(f"[MATCHING] Job {request.job_id} — Total CVs: {total_cvs}")
 
@@ -176,7 +488,11 @@ def match_cvs(request: MatchRequest, db: Session = Depends(get_db)):
         request.requirements,
         top_k=TOP_K_EMBEDDING
     )
+    return _job_candidates(db, request.job_id, top_matches), total_cvs
 
+
+def _job_candidates(db: Session, job_id: int, top_matches: list[dict]) -> list[dict]:
+    """Judge 1 hits → candidate dicts with the CV details, scoped to the job."""
     # ✅ DEDUP HERE — before building candidates
     seen_ids: set[int] = set()
     unique_matches = []
@@ -188,14 +504,7 @@ def match_cvs(request: MatchRequest, db: Session = Depends(get_db)):
     print(f"[JUDGE 1] {len(top_matches)} unique candidates after dedup")
 
     if not top_matches:
-        return MatchResponse(
-            total_cvs_scanned=total_cvs,
-            top_candidates=[],
-            match_found=False,
-            explanation="No candidates found for these requirements.",
-            near_misses=[],
-            suggestions=[]
-        )
+        return []
 
     # Fetch CV details — scoped to this job only
     cv_ids = [m["cv_id"] for m in top_matches]
@@ -203,7 +512,7 @@ def match_cvs(request: MatchRequest, db: Session = Depends(get_db)):
         cv.id: cv
         for cv in db.query(CV).filter(
             CV.id.in_(cv_ids),
-            CV.job_id == request.job_id
+            CV.job_id == job_id
         ).all()
     }
 
@@ -217,129 +526,209 @@ def match_cvs(request: MatchRequest, db: Session = Depends(get_db)):
                 "filename": cv.filename,
                 "candidate_name": cv.candidate_name,
                 "raw_text": cv.raw_text,
-                "embedding_score": match["embedding_score"]
+                "embedding_score": match["embedding_score"],
+                "candidate_id": cv.candidate_id
             })
             print(f"  → {cv.candidate_name} | embedding: {match['embedding_score']}")
 
-    # --- JUDGE 2: Reranking ---
-    print(f"\n[JUDGE 2] Running reranker on {len(candidates)} candidates...")
-    candidates = rerank_candidates(request.requirements, candidates)
-    for c in candidates:
-        print(f"  → {c['candidate_name']} | reranker: {c['reranker_score']}")
-
-    # --- JUDGE 3: Deep Profile Matching ---
-    print(f"\n[JUDGE 3] Extracting requirements profile...")
-    req_profile = extract_requirements_profile(request.requirements)
-    print(f"  Domain: {req_profile.get('domain')}")
-    print(f"  Required skills: {req_profile.get('required_skills')}")
-
-    all_results = []
-    all_near_misses = []
+    return candidates
 
-    for candidate in candidates:
-        print(f"\n  Analyzing: {candidate['candidate_name']}...")
-        cv_profile = extract_cv_profile(candidate["raw_text"])
 
-        skill_score, matched, missing = compute_full_profile_score(
-            cv_profile, req_profile
-        )
 
-        final_score = round(
-            WEIGHT_EMBEDDING * candidate["embedding_score"] +
-            WEIGHT_RERANKER * candidate["reranker_score"] +
-            WEIGHT_SKILL * skill_score,
-            4
-        )
 
-        print(f"  Embedding: {candidate['embedding_score']} | "
-              f"Reranker: {candidate['reranker_score']} | "
-              f"Skill: {skill_score} | Final: {final_score}")
+@router.post("/", response_model=MatchResponse)
+def match_cvs(request: MatchRequest, db: Session = Depends(get_db)):
+    candidates, total_cvs = _retrieve_job_candidates(request, db)
+    if not candidates:
+        return _no_candidates_response(total_cvs)
+    return _judge_candidates(db, request.requirements, candidates, total_cvs, request.use_cache)
+
+
+@router.post("/stream")
+def match_cvs_stream(request: MatchRequest, db: Session = Depends(get_db)):
+    """
+    Same pipeline as POST /match/, streamed as Server-Sent Events:
+      judge1    — embedding candidates, as soon as the search returns
+      reranked  — candidates in cross-encoder order with reranker scores
+      candidate — one per candidate as its profile completes (match or near miss)
+      final     — the complete MatchResponse, suggestions included
+    Validation errors are returned as plain HTTP errors before streaming starts.
+    """
+    candidates, total_cvs = _retrieve_job_candidates(request, db)
+
+    def events():
+        yield _sse("judge1", [
+            {
+                "cv_id": c["cv_id"],
+                "candidate_id": c.get("candidate_id"),
+                "candidate_name": c["candidate_name"],
+                "filename": c["filename"],
+                "embedding_score": c["embedding_score"]
+            }
+            for c in candidates
+        ])
+        if not candidates:
+            yield _sse("final", _no_candidates_response(total_cvs))
+            return
+        # The request-scoped session may be closed once the response starts
+        stream_db = SessionLocal()
+        try:
+            for event, payload in _judge_stream(
+                stream_db, request.requirements, candidates, total_cvs, request.use_cache
+            ):
+                yield _sse(event, payload)
+        except Exception as e:
+            print(f"[MATCHING] Stream failed: {type(e).__name__}: {e}")
+            yield _sse("error", {"detail": f"{type(e).__name__}: {e}"})
+        finally:
+            stream_db.close()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
-        passes = skill_score > 0.0 and final_score >= MINIMUM_SCORE_THRESHOLD
 
-        if passes:
-            all_results.append(CandidateMatch(
-                cv_id=candidate["cv_id"],
-                filename=candidate["filename"],
-                candidate_name=candidate["candidate_name"],
-                final_score=final_score,
-                embedding_score=candidate["embedding_score"],
-                reranker_score=candidate["reranker_score"],
-                skill_score=round(skill_score, 4),
-                match_tier=get_match_tier(final_score),
-                matched_skills=matched,
-                missing_skills=missing
-            ))
-        else:
-            near_miss = build_near_miss(
-                candidate, cv_profile, req_profile, matched, missing
-            )
-            all_near_misses.append((final_score, near_miss))
+@router.post("/batch", response_model=BatchMatchResponse)
+def match_batch(request: BatchMatchRequest, db: Session = Depends(get_db)):
+    """
+    Match many jobs in one call, e.g. a whole recruiting campaign.
+    Requirements are encoded in one batch, every job's reranking pairs go
+    through one predict(), requirements and CV profiles are extracted
+    concurrently, and a CV shared by several jobs is profiled once.
+    Jobs that cannot be matched get an error instead of failing the batch.
+    """
+    if not request.requests:
+        raise HTTPException(status_code=400, detail="No match requests given")
+
+    results: list[BatchMatchResult | None] = [None] * len(request.requests)
+    jobs = []
+    for position, job_request in enumerate(request.requests):
+        try:
+            total_cvs = _validate_job_request(job_request, db)
+        except HTTPException as e:
+            results[position] = BatchMatchResult(job_id=job_request.job_id, error=e.detail)
+            continue
+        jobs.append((position, job_request, total_cvs))
 
-    # Sort results by final score
-    all_results.sort(key=lambda x: x.final_score, reverse=True)
+    print(f"\n{'='*50}")
+    print(f"[MATCHING] Batch of {len(jobs)} job(s)")
 
-    # ✅ Guarantee at least top 3 if they have any skill match
-    if len(all_results) < 3:
-        fallback = [
-            nm for score, nm in sorted(all_near_misses, key=lambda x: x[0], reverse=True)
-            if nm.cv_id not in {r.cv_id for r in all_results}
-        ]
-        for nm in fallback[:3 - len(all_results)]:
-            # Promote near miss to result with weak tier
-            all_results.append(CandidateMatch(
-                cv_id=nm.cv_id,
-                filename=nm.filename,
-                candidate_name=nm.candidate_name,
-                final_score=0.0,
-                embedding_score=0.0,
-                reranker_score=0.0,
-                skill_score=0.0,
-                match_tier="Weak Match",
-                matched_skills=nm.skills_they_have,
-                missing_skills=nm.skills_they_lack
-            ))
+    # --- JUDGE 1: every requirements text encoded in one batch ---
+    print(f"\n[JUDGE 1] Running embedding search...")
+    hits = search_similar_cvs_batch(
+        [(job_request.job_id, job_request.requirements) for _, job_request, _ in jobs],
+        top_k=TOP_K_EMBEDDING
+    )
+    job_candidates = [
+        _job_candidates(db, job_request.job_id, job_hits)
+        for (_, job_request, _), job_hits in zip(jobs, hits)
+    ]
 
-    # Sort near misses and take top 5
-    all_near_misses.sort(key=lambda x: x[0], reverse=True)
-    top_near_misses = [nm for _, nm in all_near_misses[:5]]
+    # --- JUDGE 2: all jobs' pairs in one predict() ---
+    print(f"\n[JUDGE 2] Reranking {sum(map(len, job_candidates))} candidates across {len(jobs)} job(s)...")
+    reranked = rerank_batch([
+        (job_request.requirements, candidates, job_request.use_cache)
+        for (_, job_request, _), candidates in zip(jobs, job_candidates)
+    ])
+
+    # --- JUDGE 3: requirements + distinct CV profiles, concurrently ---
+    req_futures = {}
+    for _, job_request, _ in jobs:
+        key = (job_request.requirements, job_request.use_cache)
+        if key not in req_futures:
+            req_futures[key] = groq_executor.submit(
+                extract_requirements_profile, job_request.requirements, job_request.use_cache
+            )
+    texts = list(dict.fromkeys(c["raw_text"] for candidates in reranked for c in candidates))
+    print(f"\n[JUDGE 3] Profiling {len(req_futures)} requirement(s) + {len(texts)} distinct CV(s)...")
+    profiles = dict(zip(texts, get_cv_profiles(db, texts)))
 
-    # No matches at all
-    if not any(r.skill_score > 0 for r in all_results):
-        req_domain = req_profile.get("domain", "the required domain")
-        req_skills = req_profile.get("required_skills", [])
-        explanation = (
-            f"No candidates in the database match the requirements for '{req_domain}'. "
-            f"The tender requires expertise in: {', '.join(req_skills[:6])}. "
-            f"The {len(top_near_misses)} candidate(s) shown below are from different "
-            f"domains and lack the core required skills. "
-            f"Consider uploading CVs from professionals in {req_domain}."
+    for (position, job_request, total_cvs), candidates in zip(jobs, reranked):
+        if not candidates:
+            response = _no_candidates_response(total_cvs)
+        else:
+            req_profile = req_futures[(job_request.requirements, job_request.use_cache)].result()
+            all_results, all_near_misses = [], []
+            for candidate in candidates:
+                final_score, match, near_miss = _score_candidate(
+                    candidate, profiles[candidate["raw_text"]], req_profile
+                )
+                if match is not None:
+                    all_results.append(match)
+                else:
+                    all_near_misses.append((final_score, near_miss))
+            response = _finalize(all_results, all_near_misses, req_profile, total_cvs)
+        results[position] = BatchMatchResult(job_id=job_request.job_id, response=response)
+
+    return BatchMatchResponse(results=results)
+
+
+@router.post("/global", response_model=MatchResponse)
+def match_talent_pool(request: GlobalMatchRequest, db: Session = Depends(get_db)):
+    """
+    Match requirements against the whole deduplicated talent pool — every
+    distinct person uploaded to any job — optionally limited to job_ids.
+    Each candidate is reported with their most recent CV.
+    """
+    if not request.requirements.strip():
+        raise HTTPException(
+            status_code=400,
+            detail="Requirements text cannot be empty"
         )
-        print(f"\n[MATCHING] No matches. Showing {len(top_near_misses)} near misses.")
-        print(f"{'='*50}\n")
-        return MatchResponse(
-            total_cvs_scanned=total_cvs,
-            top_candidates=[],
-            match_found=False,
-            explanation=explanation,
-            near_misses=top_near_misses,
-            suggestions=build_suggestions([], top_near_misses, req_profile, total_cvs)
+
+    # Membership filter: candidates that still have a CV (in the given jobs),
+    # as candidate_id → id of their newest CV; only ids are read here
+    newest = func.row_number().over(
+        partition_by=CV.candidate_id,
+        order_by=(CV.uploaded_at.desc(), CV.id.desc())
+    ).label("newest")
+    ranked = db.query(CV.candidate_id, CV.id.label("cv_id"), newest).filter(CV.candidate_id.isnot(None))
+    if request.job_ids:
+        ranked = ranked.filter(CV.job_id.in_(request.job_ids))
+    ranked = ranked.subquery()
+    latest_cv_id: dict[int, int] = dict(
+        db.query(ranked.c.candidate_id, ranked.c.cv_id).filter(ranked.c.newest == 1).all()
+    )
+    total_candidates = len(latest_cv_id)
+    if total_candidates == 0:
+        raise HTTPException(
+            status_code=400,
+            detail="None of the given jobs has any CVs. Check job_ids or upload CVs to them first."
+            if request.job_ids else "The talent pool is empty. Please upload CVs first."
         )
 
-    # Final result — only matched candidates (skill > 0)
-    final_results = [r for r in all_results if r.skill_score > 0.0]
-    final_results.sort(key=lambda x: x.final_score, reverse=True)
+    print(f"\n{'='*50}")
+    print(f"[MATCHING] Talent pool — Total candidates: {total_candidates}")
 
-    print(f"\n[MATCHING] {len(final_results)} match(es) found.")
-    if final_results:
-        print(f"Top: {final_results[0].candidate_name} — {final_results[0].final_score}")
-    print(f"{'='*50}\n")
+    # --- JUDGE 1: Embedding Search over the shared index ---
+    print(f"\n[JUDGE 1] Running talent pool search...")
+    top_matches = search_talent_pool(
+        request.requirements,
+        top_k=TOP_K_EMBEDDING,
+        candidate_ids=list(latest_cv_id)
+    )
 
-    return MatchResponse(
-        total_cvs_scanned=total_cvs,
-        top_candidates=final_results[:TOP_K_FINAL],
-        match_found=True,
-        explanation=None,
-        near_misses=top_near_misses if top_near_misses else None,
-        suggestions=build_suggestions(final_results[:TOP_K_FINAL], [], req_profile, total_cvs)
-    )
\ No newline at end of file
+    if not top_matches:
+        return _no_candidates_response(total_candidates)
+
+    # Full rows (with raw_text) only for the candidates that made the cut
+    cvs = {
+        cv.id: cv for cv in
+        db.query(CV).filter(CV.id.in_([latest_cv_id[m["candidate_id"]] for m in top_matches])).all()
+    }
+    candidates = []
+    for match in top_matches:
+        cv = cvs[latest_cv_id[match["candidate_id"]]]
+        candidates.append({
+            "cv_id": cv.id,
+            "filename": cv.filename,
+            "candidate_name": cv.candidate_name,
+            "raw_text": cv.raw_text,
+            "embedding_score": match["embedding_score"],
+            "candidate_id": match["candidate_id"]
+        })
+        print(f"  → {cv.candidate_name} | embedding: {match['embedding_score']}")
+
+    return _judge_candidates(db, request.requirements, candidates, total_candidates, request.use_cache)
@@ -2,26 +2,29 @@
 Smart Tender Detection Router
 Endpoints for scoring and filtering public tenders against the company profile.
 Data files live at: backend/data/company_data.json  and  backend/data/tenders.csv
+Tenders are synced from the CSV into the `tenders` table and queried in SQL.
 """
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
 from functools import lru_cache
 from typing import Optional
+import json
 import os
+import threading
+import time
 
+from database import get_db, Tender
 from models.schemas import (
     TenderDetectRequest,
     TenderDetectResponse,
     TenderResult,
     CompanyProfile,
     TenderStatsResponse,
+    TenderReloadResponse,
 )
-from services.tender_detector import (
-    load_company_profile,
-    load_tenders_from_csv,
-    compute_scores,
-    is_excluded,
-)
+from services.tender_detector import load_company_profile, days_to_deadline
+from services.tender_store import sync_tenders, query_tenders, count_tenders, tender_stats as compute_tender_stats
 
 router = APIRouter(prefix="/tenders", tags=["Tender Detection"])
 
@@ -31,50 +34,90 @@ COMPANY_JSON = os.path.join(_HERE, "..", "data", "company_data.json")
 DATA_CSV     = os.path.join(_HERE, "..", "data", "tenders.csv")
 
 
-# ── Cached loaders (models / files load once per process) ─────────────────────
+# ── Loaders ────────────────────────────────────────────────────────────────────
 
-@lru_cache(maxsize=1)
-def _get_profile() -> dict:
+def _read_profile() -> dict:
     path = os.path.abspath(COMPANY_JSON)
     if not os.path.exists(path):
         raise FileNotFoundError(f"company_data.json not found at {path}")
     return load_company_profile(path)
 
 
-@lru_cache(maxsize=1)
-def _get_tenders() -> list:
+def _csv_path() -> str:
     path = os.path.abspath(DATA_CSV)
     if not os.path.exists(path):
         raise FileNotFoundError(f"tenders.csv not found at {path}")
-    return load_tenders_from_csv(path)
+    return path
 
 
 @lru_cache(maxsize=1)
-def _get_scored_tenders() -> list:
-    """Compute and cache the fully-scored tender list (heavy — done once)."""
-    profile = _get_profile()
-    tenders = _get_tenders()
-    return compute_scores(profile, tenders)
+def _get_profile() -> dict:
+    return _read_profile()
+
+
+# The table is synced with the CSV and profile once per process, then on
+# /reload; a sync commits once, so readers never see it half done
+_synced = False
+_sync_lock = threading.Lock()
+
+
+def _sync(db: Session) -> dict:
+    global _synced
+    stats = sync_tenders(db, _read_profile(), _csv_path())
+    _synced = True
+    return stats
+
+
+def _ensure_synced(db: Session):
+    if _synced:
+        return
+    with _sync_lock:
+        if not _synced:
+            _sync(db)
+
+
+def _catalogue(db: Session) -> dict:
+    """Company profile of a synced catalogue, with the usual error mapping."""
+    try:
+        _ensure_synced(db)
+        return _get_profile()
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
 
 # ── Helper ─────────────────────────────────────────────────────────────────────
 
-def _tender_to_result(t: dict, profile: dict) -> TenderResult:
+def _tender_to_result(t: Tender) -> TenderResult:
     return TenderResult(
-        title=t["title"],
-        issuing_authority=t["issuing_authority"],
-        project_description=t["project_description"],
-        required_skills=t["required_skills_display"],
-        publication_date=t["publication_date"],
-        submission_deadline=t["submission_deadline"],
-        days_to_deadline=t.get("days_to_deadline"),
-        contract_duration_months=t.get("contract_duration_months"),
-        budget_currency=t.get("budget_currency"),
-        budget_min=t.get("budget_min"),
-        budget_max=t.get("budget_max"),
-        semantic_score=t["semantic_score"],
-        semantic_similarity=t["semantic_similarity"],
-        is_excluded=is_excluded(t, profile),
+        title=t.title,
+        issuing_authority=t.issuing_authority,
+        project_description=t.project_description,
+        required_skills=json.loads(t.required_skills),
+        publication_date=t.publication_date or "",
+        submission_deadline=t.submission_deadline or "",
+        days_to_deadline=days_to_deadline(t.submission_deadline),
+        contract_duration_months=t.contract_duration_months,
+        budget_currency=t.budget_currency,
+        budget_min=t.budget_min,
+        budget_max=t.budget_max,
+        semantic_score=t.semantic_score,
+        semantic_similarity=t.semantic_similarity,
+        is_excluded=t.is_excluded,
+    )
+
+
+def _page(db: Session, profile: dict, query, offset: int, limit: Optional[int]) -> TenderDetectResponse:
+    query = query.offset(offset)
+    if limit is not None:
+        query = query.limit(limit)
+    results = [_tender_to_result(t) for t in query.all()]
+    return TenderDetectResponse(
+        total_tenders=count_tenders(db),
+        returned=len(results),
+        company=profile.get("company_name", ""),
+        results=results,
     )
 
 
@@ -108,191 +151,115 @@ def get_company_profile():
         raise HTTPException(status_code=404, detail=str(e))
 
 
-@router.post("/detect", response_model=TenderDetectResponse)
-def detect_tenders(request: TenderDetectRequest):
+@router.post("/reload", response_model=TenderReloadResponse)
+def reload_tenders(db: Session = Depends(get_db)):
     """
-    Score all tenders against the company profile and return the top matches.
-
-    - **top_k**: how many results to return (default 10)
-    - **min_score**: minimum semantic score (0-100) to include
-    - **include_excluded**: if true, also return tenders matching excluded domains
-    - **keyword**: optional keyword filter on title / description
+    Re-read the company profile and tenders.csv: new tenders are inserted,
+    edited ones updated, tenders no longer in the CSV removed, and every
+    tender rescored. Embeddings are kept for unchanged tender texts, so
+    only new or edited tenders are encoded.
+    Requests keep reading the previous catalogue until the sync commits.
     """
+    start = time.perf_counter()
     try:
-        profile  = _get_profile()
-        scored   = _get_scored_tenders()
+        with _sync_lock:
+            stats = _sync(db)
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except RuntimeError as e:
         raise HTTPException(status_code=500, detail=str(e))
+    _get_profile.cache_clear()
+
+    return TenderReloadResponse(
+        total_tenders=stats["total_tenders"],
+        inserted=stats["inserted"],
+        updated=stats["updated"],
+        removed=stats["removed"],
+        encoded=stats["encoded"],
+        reused=stats["reused"],
+        seconds=round(time.perf_counter() - start, 3),
+    )
 
-    results = []
-    for t in scored:
-        excluded = is_excluded(t, profile)
-
-        if excluded and not request.include_excluded:
-            continue
-
-        if t["semantic_score"] < (request.min_score or 0.0):
-            continue
-
-        # Optional keyword filter
-        if request.keyword:
-            kw = request.keyword.lower()
-            if kw not in t["title"].lower() and kw not in t["project_description"].lower():
-                continue
-
-        results.append(_tender_to_result(t, profile))
 
-    top_k   = request.top_k or 10
-    returned = results[:top_k]
+@router.post("/detect", response_model=TenderDetectResponse)
+def detect_tenders(request: TenderDetectRequest, db: Session = Depends(get_db)):
+    """
+    Score all tenders against the company profile and return the top matches.
 
-    return TenderDetectResponse(
-        total_tenders=len(scored),
-        returned=len(returned),
-        company=profile.get("company_name", ""),
-        results=returned,
+    - **top_k**: how many results to return (default 10)
+    - **min_score**: minimum semantic score (0-100) to include
+    - **include_excluded**: if true, also return tenders matching excluded domains
+    - **keyword**: optional keyword filter on title / description
+    - **offset**: skip this many matches (pagination)
+    """
+    profile = _catalogue(db)
+    query = query_tenders(
+        db,
+        include_excluded=request.include_excluded,
+        min_score=request.min_score or 0.0,
+        keyword=request.keyword,
     )
+    return _page(db, profile, query, request.offset or 0, request.top_k or 10)
 
 
 @router.get("/all", response_model=TenderDetectResponse)
 def list_all_tenders(
     include_excluded: bool = Query(False, description="Include excluded-domain tenders"),
+    limit: Optional[int] = Query(None, ge=1, description="Page size; all tenders when omitted"),
+    offset: int = Query(0, ge=0, description="Skip this many tenders"),
+    db: Session = Depends(get_db),
 ):
     """
     Return ALL tenders with their semantic scores (no top-k limit).
-    Useful for table views or exploration in the frontend.
+    Useful for table views or exploration in the frontend; pass limit /
+    offset to page through large catalogues.
     """
-    try:
-        profile = _get_profile()
-        scored  = _get_scored_tenders()
-    except FileNotFoundError as e:
-        raise HTTPException(status_code=404, detail=str(e))
-    except RuntimeError as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-    results = []
-    for t in scored:
-        excluded = is_excluded(t, profile)
-        if excluded and not include_excluded:
-            continue
-        results.append(_tender_to_result(t, profile))
-
-    return TenderDetectResponse(
-        total_tenders=len(scored),
-        returned=len(results),
-        company=profile.get("company_name", ""),
-        results=results,
-    )
+    profile = _catalogue(db)
+    query = query_tenders(db, include_excluded=include_excluded)
+    return _page(db, profile, query, offset, limit)
 
 
 @router.get("/top", response_model=TenderDetectResponse)
 def top_tenders(
     k: int = Query(10, ge=1, le=100, description="Number of top tenders to return"),
     min_score: float = Query(0.0, ge=0.0, le=100.0, description="Minimum semantic score"),
+    offset: int = Query(0, ge=0, description="Skip this many tenders"),
+    db: Session = Depends(get_db),
 ):
     """
     Quick GET version of /detect — returns top-k eligible tenders above min_score.
     Perfect for dashboard widgets.
     """
-    try:
-        profile = _get_profile()
-        scored  = _get_scored_tenders()
-    except FileNotFoundError as e:
-        raise HTTPException(status_code=404, detail=str(e))
-    except RuntimeError as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-    eligible = [
-        t for t in scored
-        if not is_excluded(t, profile) and t["semantic_score"] >= min_score
-    ]
-
-    results = [_tender_to_result(t, profile) for t in eligible[:k]]
-
-    return TenderDetectResponse(
-        total_tenders=len(scored),
-        returned=len(results),
-        company=profile.get("company_name", ""),
-        results=results,
-    )
+    profile = _catalogue(db)
+    query = query_tenders(db, min_score=min_score)
+    return _page(db, profile, query, offset, k)
 
 
 @router.get("/stats", response_model=TenderStatsResponse)
-def tender_stats():
+def tender_stats(db: Session = Depends(get_db)):
     """
     Return summary statistics about the full tender dataset and matching scores.
     Useful for dashboard charts and KPIs.
     """
-    try:
-        profile = _get_profile()
-        scored  = _get_scored_tenders()
-    except FileNotFoundError as e:
-        raise HTTPException(status_code=404, detail=str(e))
-    except RuntimeError as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-    if not scored:
+    _catalogue(db)
+    stats = compute_tender_stats(db)
+    if not stats["total_tenders"]:
         raise HTTPException(status_code=404, detail="No tenders found in dataset.")
-
-    scores           = [t["semantic_score"] for t in scored]
-    excluded_list    = [t for t in scored if is_excluded(t, profile)]
-    eligible_list    = [t for t in scored if not is_excluded(t, profile)]
-
-    # Count tenders expiring in next 30 days
-    upcoming = sum(
-        1 for t in scored
-        if isinstance(t.get("days_to_deadline"), int) and 0 <= t["days_to_deadline"] <= 30
-    )
-
-    # Score buckets: high ≥ 70, medium 40–69, low < 40
-    buckets = {
-        "high":   sum(1 for s in scores if s >= 70),
-        "medium": sum(1 for s in scores if 40 <= s < 70),
-        "low":    sum(1 for s in scores if s < 40),
-    }
-
-    return TenderStatsResponse(
-        total_tenders=len(scored),
-        avg_semantic_score=round(sum(scores) / len(scores), 2),
-        max_semantic_score=max(scores),
-        min_semantic_score=min(scores),
-        excluded_count=len(excluded_list),
-        eligible_count=len(eligible_list),
-        score_buckets=buckets,
-        upcoming_deadlines=upcoming,
-    )
+    return TenderStatsResponse(**stats)
 
 
 @router.get("/search", response_model=TenderDetectResponse)
 def search_tenders(
     q: str = Query(..., min_length=2, description="Keyword to search in title and description"),
     include_excluded: bool = Query(False),
+    limit: Optional[int] = Query(None, ge=1, description="Page size; all matches when omitted"),
+    offset: int = Query(0, ge=0, description="Skip this many matches"),
+    db: Session = Depends(get_db),
 ):
     """
     Free-text search across tender titles and project descriptions.
     Returns all matching tenders ordered by semantic score desc.
     """
-    try:
-        profile = _get_profile()
-        scored  = _get_scored_tenders()
-    except FileNotFoundError as e:
-        raise HTTPException(status_code=404, detail=str(e))
-    except RuntimeError as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-    kw = q.lower()
-    results = []
-    for t in scored:
-        excluded = is_excluded(t, profile)
-        if excluded and not include_excluded:
-            continue
-        if kw in t["title"].lower() or kw in t["project_description"].lower():
-            results.append(_tender_to_result(t, profile))
-
-    return TenderDetectResponse(
-        total_tenders=len(scored),
-        returned=len(results),
-        company=profile.get("company_name", ""),
-        results=results,
-    )
+    profile = _catalogue(db)
+    query = query_tenders(db, include_excluded=include_excluded, keyword=q)
+    return _page(db, profile, query, offset, limit)
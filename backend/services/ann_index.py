@@ -0,0 +1,207 @@
+"""
+FAISS index factory for CV / talent pool indexes.
+
+Every index is an IndexIDMap2 (ids = owner primary keys, see embedder.py)
+around one of three inner indexes:
+- flat:  exact IndexFlatIP, used until an index reaches ANN_PROMOTION_THRESHOLD
+- hnsw:  IndexHNSWFlat graph, no training, high recall
+- ivfpq: IndexIVFPQ, trained on the current vectors, compressed (lossy) codes
+
+Only flat indexes compact cleanly under IndexIDMap2.remove_ids; on the
+other kinds removed ids stay as tombstones, filtered out at search time,
+until a background rebuild compacts them (see embedder.py). PQ codes
+cannot give the original vectors back, so every ivfpq index keeps them in
+an ExactVectors sidecar: rebuilds, retraining and copies read from it and
+never re-quantize already lossy data.
+"""
+
+import math
+import os
+
+import faiss
+import numpy as np
+
+from config import (
+    ANN_INDEX_TYPE,
+    ANN_PROMOTION_THRESHOLD,
+    HNSW_M,
+    HNSW_EF_CONSTRUCTION,
+    HNSW_EF_SEARCH,
+    IVF_NLIST,
+    IVF_NPROBE,
+    IVF_PQ_M,
+    IVF_RETRAIN_GROWTH
+)
+
+INDEX_KINDS = ("flat", "hnsw", "ivfpq")
+
+
+def index_kind(index) -> str:
+    inner = faiss.downcast_index(index.index)
+    if isinstance(inner, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(inner, faiss.IndexIVF):
+        return "ivfpq"
+    return "flat"
+
+
+def _ivf_nlist(n: int) -> int:
+    nlist = IVF_NLIST or int(4 * math.sqrt(n))
+    # FAISS wants ~39 training points per centroid
+    return max(1, min(nlist, n // 39))
+
+
+def _pq_nbits(n: int) -> int:
+    """Bits per PQ sub-quantizer: 8 (256 centroids) once there are ~39 training points per centroid."""
+    return max(1, min(8, int(math.log2(max(n, 78) / 39))))
+
+
+def configure(index):
+    """Apply search-time knobs (efSearch / nprobe) to a built or loaded index."""
+    inner = faiss.downcast_index(index.index)
+    if isinstance(inner, faiss.IndexHNSW):
+        inner.hnsw.efSearch = HNSW_EF_SEARCH
+    elif isinstance(inner, faiss.IndexIVF):
+        inner.nprobe = IVF_NPROBE
+        inner.make_direct_map()   # needed by reconstruct() for rebuilds / vector copies
+    return index
+
+
+def build_index(kind: str, vectors: np.ndarray, ids: np.ndarray):
+    """Build an id-mapped index of the given kind holding (vectors, ids)."""
+    dim = vectors.shape[1]
+    if kind == "hnsw":
+        inner = faiss.IndexHNSWFlat(dim, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        inner.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    elif kind == "ivfpq":
+        quantizer = faiss.IndexFlatIP(dim)
+        inner = faiss.IndexIVFPQ(quantizer, dim, _ivf_nlist(len(vectors)), IVF_PQ_M,
+                                 _pq_nbits(len(vectors)), faiss.METRIC_INNER_PRODUCT)
+        inner.train(vectors)
+    else:
+        inner = faiss.IndexFlatIP(dim)
+    index = faiss.IndexIDMap2(inner)
+    if len(vectors):
+        index.add_with_ids(vectors, ids)
+    return configure(index)
+
+
+def empty_index(dim: int):
+    return faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+
+
+def all_vectors(index) -> tuple[np.ndarray, np.ndarray]:
+    """(vectors, ids) currently stored — exact for flat/hnsw, PQ-approximate for ivfpq."""
+    ids = faiss.vector_to_array(index.id_map).astype(np.int64)
+    if len(ids) == 0:
+        return np.zeros((0, index.d), dtype=np.float32), ids
+    inner = faiss.downcast_index(index.index)
+    if isinstance(inner, faiss.IndexIVF):
+        vectors = np.vstack([index.reconstruct(int(i)) for i in ids])
+    else:
+        vectors = inner.reconstruct_n(0, inner.ntotal)
+    return vectors.astype(np.float32), ids
+
+
+class ExactVectors:
+    """
+    Append-only float32 vectors + int64 ids on disk (<path>.f32 / <path>.ids).
+    Appends cost only the new rows; an id written twice resolves to its
+    last row, and rewrite() compacts the files.
+    """
+
+    def __init__(self, path: str, dim: int):
+        self.dim = dim
+        self._vectors_path = path + ".f32"
+        self._ids_path = path + ".ids"
+        self._rows: dict[int, int] | None = None   # id -> row, loaded lazily
+
+    def _load_rows(self) -> dict[int, int]:
+        if self._rows is None:
+            ids = np.fromfile(self._ids_path, dtype=np.int64) if os.path.exists(self._ids_path) else []
+            self._rows = {int(vid): row for row, vid in enumerate(ids)}
+        return self._rows
+
+    def append(self, ids: np.ndarray, vectors: np.ndarray):
+        rows = self._load_rows()
+        start = os.path.getsize(self._ids_path) // 8 if os.path.exists(self._ids_path) else 0
+        with open(self._vectors_path, "ab") as f:
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        with open(self._ids_path, "ab") as f:
+            f.write(np.ascontiguousarray(ids, dtype=np.int64).tobytes())
+        for offset, vid in enumerate(ids):
+            rows[int(vid)] = start + offset
+
+    def get(self, ids: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """(vectors, missing mask) for ids; missing rows are left as zeros."""
+        rows = self._load_rows()
+        positions = np.array([rows.get(int(vid), -1) for vid in ids], dtype=np.int64)
+        missing = positions < 0
+        vectors = np.zeros((len(ids), self.dim), dtype=np.float32)
+        if (~missing).any():
+            stored = np.memmap(self._vectors_path, dtype=np.float32, mode="r").reshape(-1, self.dim)
+            vectors[~missing] = stored[positions[~missing]]
+        return vectors, missing
+
+    def rewrite(self, ids: np.ndarray, vectors: np.ndarray):
+        """Replace the contents with exactly (ids, vectors), via temp files."""
+        for path, data in [(self._vectors_path, np.ascontiguousarray(vectors, dtype=np.float32)),
+                           (self._ids_path, np.ascontiguousarray(ids, dtype=np.int64))]:
+            data.tofile(path + ".tmp")
+            os.replace(path + ".tmp", path)
+        self._rows = {int(vid): row for row, vid in enumerate(ids)}
+
+    def move_to(self, path: str):
+        """Rename the files to <path>.f32 / <path>.ids, replacing any there."""
+        for old, new in [(self._vectors_path, path + ".f32"), (self._ids_path, path + ".ids")]:
+            os.replace(old, new)
+        self._vectors_path, self._ids_path = path + ".f32", path + ".ids"
+
+    def delete(self):
+        for path in [self._vectors_path, self._ids_path]:
+            if os.path.exists(path):
+                os.remove(path)
+        self._rows = None
+
+
+def target_kind(index, trained_on: int) -> str | None:
+    """Kind the index should be rebuilt as after growing, or None to keep it."""
+    kind = index_kind(index)
+    if ANN_INDEX_TYPE not in INDEX_KINDS:
+        return None
+    if kind == "flat" and ANN_INDEX_TYPE != "flat" and index.ntotal >= ANN_PROMOTION_THRESHOLD:
+        return ANN_INDEX_TYPE
+    if kind == "ivfpq" and index.ntotal >= IVF_RETRAIN_GROWTH * max(trained_on, 1):
+        return "ivfpq"
+    return None
+
+
+def supports_remove(index) -> bool:
+    return index_kind(index) == "flat"
+
+
+def search_params(index, selector, k: int, selectivity: float):
+    """
+    SearchParameters matching the inner index type (FAISS rejects mismatches).
+    selectivity is the fraction of vectors the selector lets through:
+    efSearch / nprobe grow by its inverse, so a filtered search still
+    visits about as many allowed vectors as an unfiltered one.
+    """
+    inner = faiss.downcast_index(index.index)
+    widen = 1.0 / max(selectivity, 1e-6)
+    if isinstance(inner, faiss.IndexHNSW):
+        ef = min(math.ceil(max(HNSW_EF_SEARCH, k) * widen), index.ntotal)
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=max(ef, k))
+    if isinstance(inner, faiss.IndexIVF):
+        nprobe = min(math.ceil(IVF_NPROBE * widen), inner.nlist)
+        return faiss.SearchParametersIVF(sel=selector, nprobe=nprobe)
+    return faiss.SearchParameters(sel=selector)
+
+
+def nbytes_per_vector(index) -> int:
+    kind = index_kind(index)
+    if kind == "hnsw":
+        return index.d * 4 + HNSW_M * 2 * 4
+    if kind == "ivfpq":
+        return faiss.downcast_index(index.index).code_size + 8
+    return index.d * 4
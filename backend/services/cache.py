@@ -0,0 +1,143 @@
+"""
+Small persistent LRU cache on top of SQLite.
+Each cache owns a namespace in the cache_entries table and is bounded
+by a maximum number of entries; the least recently used rows are evicted.
+A hit only rewrites last_used_at when it is older than
+CACHE_TOUCH_INTERVAL_SECONDS, so most reads stay reads: recency is exact
+to within that interval, which is plenty for choosing what to evict.
+"""
+
+from datetime import datetime, timedelta
+import json
+import threading
+
+from config import CACHE_TOUCH_INTERVAL_SECONDS
+from database import SessionLocal, CacheEntry
+
+_TOUCH_INTERVAL = timedelta(seconds=CACHE_TOUCH_INTERVAL_SECONDS)
+
+
+def _needs_touch(row, now: datetime) -> bool:
+    return row.last_used_at is None or now - row.last_used_at >= _TOUCH_INTERVAL
+
+
+class PersistentCache:
+    def __init__(self, namespace: str, max_entries: int,
+                 dumps=lambda v: json.dumps(v).encode("utf-8"),
+                 loads=lambda b: json.loads(b.decode("utf-8"))):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self._dumps = dumps
+        self._loads = loads
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str):
+        db = SessionLocal()
+        try:
+            row = db.get(CacheEntry, (self.namespace, key))
+            if row is None:
+                with self._lock:
+                    self.misses += 1
+                return None
+            value = row.value
+            now = datetime.utcnow()
+            if _needs_touch(row, now):
+                row.last_used_at = now
+                db.commit()
+            with self._lock:
+                self.hits += 1
+            return self._loads(value)
+        finally:
+            db.close()
+
+    def put(self, key: str, value):
+        db = SessionLocal()
+        try:
+            db.merge(CacheEntry(
+                namespace=self.namespace,
+                key=key,
+                value=self._dumps(value),
+                last_used_at=datetime.utcnow()
+            ))
+            db.commit()
+            self._evict(db)
+        finally:
+            db.close()
+
+    def get_many(self, keys: list[str]) -> dict:
+        """Batched get() in one query → {key: value} for the keys present."""
+        if not keys:
+            return {}
+        db = SessionLocal()
+        try:
+            rows = db.query(CacheEntry).filter(
+                CacheEntry.namespace == self.namespace,
+                CacheEntry.key.in_(set(keys))
+            ).all()
+            found = {row.key: self._loads(row.value) for row in rows}
+            now = datetime.utcnow()
+            stale = [row.key for row in rows if _needs_touch(row, now)]
+            if stale:
+                db.query(CacheEntry).filter(
+                    CacheEntry.namespace == self.namespace,
+                    CacheEntry.key.in_(stale)
+                ).update({CacheEntry.last_used_at: now}, synchronize_session=False)
+                db.commit()
+        finally:
+            db.close()
+        with self._lock:
+            self.hits += sum(1 for k in keys if k in found)
+            self.misses += sum(1 for k in keys if k not in found)
+        return found
+
+    def put_many(self, items: dict):
+        """Batched put() with a single commit and eviction pass."""
+        if not items:
+            return
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            for key, value in items.items():
+                db.merge(CacheEntry(
+                    namespace=self.namespace,
+                    key=key,
+                    value=self._dumps(value),
+                    last_used_at=now
+                ))
+            db.commit()
+            self._evict(db)
+        finally:
+            db.close()
+
+    def _evict(self, db):
+        query = db.query(CacheEntry).filter(CacheEntry.namespace == self.namespace)
+        overflow = query.count() - self.max_entries
+        if overflow <= 0:
+            return
+        stale = [
+            row.key for row in
+            query.order_by(CacheEntry.last_used_at.asc()).limit(overflow).all()
+        ]
+        query.filter(CacheEntry.key.in_(stale)).delete(synchronize_session=False)
+        db.commit()
+        with self._lock:
+            self.evictions += len(stale)
+
+    def stats(self) -> dict:
+        db = SessionLocal()
+        try:
+            entries = db.query(CacheEntry).filter(CacheEntry.namespace == self.namespace).count()
+        finally:
+            db.close()
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
@@ -1,88 +1,743 @@
-from sentence_transformers import SentenceTransformer
+from collections import OrderedDict, Counter, defaultdict
+from contextlib import contextmanager
+import atexit
 import faiss
 import numpy as np
 import os
 import pickle
-from config import EMBEDDING_MODEL, EMBEDDINGS_PATH
+import threading
+import time
+from config import (
+    EMBEDDING_MODEL,
+    EMBEDDING_BACKEND,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_CHUNKING,
+    CHUNK_SIZE_WORDS,
+    CHUNK_OVERLAP_WORDS,
+    MAX_CHUNKS_PER_CV,
+    CHUNK_AGGREGATION,
+    CHUNK_TOP_N,
+    EMBEDDINGS_PATH,
+    INDEX_CACHE_MAX_MB,
+    INDEX_FLUSH_INTERVAL_SECONDS,
+    ANN_PROMOTION_THRESHOLD,
+    ANN_COMPACT_FRACTION
+)
+from services import ann_index
+from services.model_provider import sentence_transformer
 
 os.makedirs(EMBEDDINGS_PATH, exist_ok=True)
 
-print("Loading embedding model...")
-embedding_model = SentenceTransformer(EMBEDDING_MODEL)
-print("Embedding model loaded.")
+
+embedding_model = sentence_transformer("embedding", EMBEDDING_MODEL, EMBEDDING_BACKEND)
+
+
+# ─────────────────────────────────────────────────────
+# RESIDENT INDEX REGISTRY
+# job_id -> {"index", "chunks", "tombstones", "nbytes", "version", "saved",
+#            "trained_on", "exact", "rebuild", "log", "generation",
+#            "lock", "write_lock", "gone"}, kept in LRU order.
+# Each job index is an IndexIDMap2 whose ids are CV primary keys:
+# vector id = (cv_id << CHUNK_ID_BITS) | chunk, so a CV's passages form a
+# contiguous id range that can be removed in one call.
+# "chunks" maps cv_id -> number of stored passages (O(1) membership).
+# Indexes start exact and are promoted to an ANN tier as they grow
+# (see services/ann_index.py); "trained_on" is the size at the last build,
+# and "exact" is the ExactVectors sidecar of an ivfpq index (else None).
+# ANN kinds cannot remove vectors in place: a removed CV moves from
+# "chunks" to "tombstones" (persisted in a .tomb sidecar) and is filtered
+# out of searches until a rebuild drops it. Promotions, IVF retraining and
+# compactions are built by a background thread from a snapshot ("rebuild"
+# is the requested kind, "log" the vectors added while it builds) and
+# swapped in under the entry lock; "generation" counts swaps.
+# Hot jobs are searched in RAM; changes are written back by a
+# background flusher instead of on every upload.
+#
+# Locking: _registry_lock only guards the registry itself (membership, LRU
+# order, byte accounting) and is never held while searching, building or
+# writing. Each entry has its own "lock" for its index; searches and
+# updates on different jobs run in parallel. Saving serializes the index
+# under the entry lock and writes the bytes after releasing it ("version"
+# counts changes, "saved" is the last version on disk). An entry lock may
+# be held while taking _registry_lock, never the other way round (eviction
+# only tries an entry lock without waiting).
+# ─────────────────────────────────────────────────────
+CHUNK_ID_BITS = 10  # up to 1024 passages per CV
+
+# The cross-job talent pool lives in the same registry under this key;
+# its vector ids use candidate ids instead of CV ids.
+TALENT_POOL_KEY = -1
+
+_registry: "OrderedDict[int, dict]" = OrderedDict()
+_evicting: dict[int, dict] = {}   # out of the LRU, waiting for their last save
+_registry_lock = threading.RLock()
+_registry_bytes = 0
+_max_bytes = INDEX_CACHE_MAX_MB * 1024 * 1024
+_flush_event = threading.Event()
+_rebuild_event = threading.Event()
 
 
 def _index_path(job_id: int) -> str:
+    if job_id == TALENT_POOL_KEY:
+        return os.path.join(EMBEDDINGS_PATH, "talent_pool.index")
     return os.path.join(EMBEDDINGS_PATH, f"job_{job_id}.index")
 
 
-def _meta_path(job_id: int) -> str:
+def _exact_path(job_id: int) -> str:
+    return _index_path(job_id) + ".exact"
+
+
+def _tomb_path(job_id: int) -> str:
+    return _index_path(job_id) + ".tomb"
+
+
+def _exact_store(job_id: int, index):
+    """Sidecar of exact vectors for an ivfpq index, None for exact kinds."""
+    if index is None or ann_index.index_kind(index) != "ivfpq":
+        return None
+    return ann_index.ExactVectors(_exact_path(job_id), index.d)
+
+
+def _legacy_meta_path(job_id: int) -> str:
     return os.path.join(EMBEDDINGS_PATH, f"job_{job_id}.pkl")
 
 
+def _vector_id(cv_id: int, chunk: int) -> int:
+    return (cv_id << CHUNK_ID_BITS) | chunk
+
+
+def _cv_id_range(cv_id: int) -> tuple[int, int]:
+    return cv_id << CHUNK_ID_BITS, (cv_id + 1) << CHUNK_ID_BITS
+
+
+def _estimate_nbytes(index) -> int:
+    """Approximate RAM footprint of a job index (vectors + id maps)."""
+    if index is None:
+        return 0
+    return index.ntotal * (ann_index.nbytes_per_vector(index) + 24)
+
+
 def embed_text(text: str) -> np.ndarray:
-    return embedding_model.encode(text, normalize_embeddings=True)
+    return embedding_model.get().encode(text, normalize_embeddings=True)
+
+
+def embed_texts(texts: list[str]) -> np.ndarray:
+    """Encode many texts in one batched call → (n, dim) float32 matrix."""
+    return embedding_model.get().encode(
+        texts,
+        batch_size=EMBEDDING_BATCH_SIZE,
+        normalize_embeddings=True
+    ).astype(np.float32)
+
+
+def chunk_text(text: str) -> list[str]:
+    """Split text into overlapping word windows (at most MAX_CHUNKS_PER_CV)."""
+    words = text.split()
+    if len(words) <= CHUNK_SIZE_WORDS:
+        return [text]
+    step = max(1, CHUNK_SIZE_WORDS - CHUNK_OVERLAP_WORDS)
+    max_chunks = min(MAX_CHUNKS_PER_CV, 1 << CHUNK_ID_BITS)
+    chunks = []
+    for start in range(0, len(words), step):
+        chunks.append(" ".join(words[start:start + CHUNK_SIZE_WORDS]))
+        if start + CHUNK_SIZE_WORDS >= len(words) or len(chunks) == max_chunks:
+            break
+    return chunks
+
+
+def _chunk_counts(index) -> dict[int, int]:
+    if index is None or index.ntotal == 0:
+        return {}
+    ids = faiss.vector_to_array(index.id_map)
+    return dict(Counter((ids >> CHUNK_ID_BITS).tolist()))
+
+
+def _migrate_legacy_index(job_id: int, flat_index):
+    """Convert an old IndexFlatIP + pickle sidecar into an id-mapped index."""
+    with open(_legacy_meta_path(job_id), "rb") as f:
+        meta = pickle.load(f)
+    vectors = flat_index.reconstruct_n(0, flat_index.ntotal)
+    index = ann_index.empty_index(flat_index.d)
+    seen, keep, ids = set(), [], []
+    for i, m in enumerate(meta[:flat_index.ntotal]):
+        vid = _vector_id(m["cv_id"], m.get("chunk", 0))
+        if vid not in seen:
+            seen.add(vid)
+            keep.append(i)
+            ids.append(vid)
+    if keep:
+        index.add_with_ids(vectors[keep], np.array(ids, dtype=np.int64))
+    print(f"[EMBEDDER] Migrated job {job_id} index to id-mapped format ({len(keep)} vectors)")
+    return index
 
 
 def load_index(job_id: int):
+    """Read a job index from disk → (index or None, needs_save)."""
+    idx_path = _index_path(job_id)
+    if not os.path.exists(idx_path):
+        return None, False
+    index = faiss.read_index(idx_path)
+    if isinstance(index, faiss.IndexIDMap2):
+        return ann_index.configure(index), False
+    if os.path.exists(_legacy_meta_path(job_id)):
+        return _migrate_legacy_index(job_id, index), True
+    return None, False
+
+
+def _write_index(job_id: int, data: np.ndarray, tombstones: np.ndarray):
+    """Write a serialized index and its tombstoned owners. Write to a temp
+    file then swap, so a crash never leaves a torn index; tombstones go
+    first, so a removed CV never comes back."""
+    tomb_path = _tomb_path(job_id)
+    if len(tombstones):
+        tombstones.tofile(tomb_path + ".tmp")
+        os.replace(tomb_path + ".tmp", tomb_path)
+    elif os.path.exists(tomb_path):
+        os.remove(tomb_path)
     idx_path = _index_path(job_id)
-    meta_path = _meta_path(job_id)
-    if os.path.exists(idx_path) and os.path.exists(meta_path):
-        index = faiss.read_index(idx_path)
-        with open(meta_path, "rb") as f:
-            meta = pickle.load(f)
-        return index, meta
-    return None, []
+    data.tofile(idx_path + ".tmp")
+    os.replace(idx_path + ".tmp", idx_path)
+    if os.path.exists(_legacy_meta_path(job_id)):
+        os.remove(_legacy_meta_path(job_id))
+
+
+def _new_entry(job_id: int, index) -> dict:
+    chunks = _chunk_counts(index)
+    tombstones = {}
+    if os.path.exists(_tomb_path(job_id)):
+        for owner in np.fromfile(_tomb_path(job_id), dtype=np.int64).tolist():
+            if owner in chunks:
+                tombstones[owner] = chunks.pop(owner)
+    entry = {
+        "index": index,
+        "chunks": chunks,
+        "tombstones": tombstones,
+        "nbytes": _estimate_nbytes(index),
+        "version": 0,
+        "saved": 0,
+        "trained_on": index.ntotal if index is not None else 0,
+        "exact": _exact_store(job_id, index),
+        "rebuild": None,
+        "log": None,
+        "generation": 0,
+        "lock": threading.RLock(),
+        "write_lock": threading.Lock(),
+        "gone": False
+    }
+    _schedule_rebuild(entry)
+    return entry
+
+
+def _evict_if_needed():
+    """Drop least-recently-used jobs until the registry fits its budget.
+    Caller must hold _registry_lock. Entries with unsaved changes, or in use
+    right now, wait in _evicting for the flusher instead of being saved here."""
+    global _registry_bytes
+    while _registry_bytes > _max_bytes and len(_registry) > 1:
+        job_id, entry = _registry.popitem(last=False)
+        _registry_bytes -= entry["nbytes"]
+        if entry["lock"].acquire(blocking=False):
+            if entry["version"] <= entry["saved"]:
+                entry["gone"] = True
+            entry["lock"].release()
+        if not entry["gone"]:
+            _evicting[job_id] = entry
+            _flush_event.set()
+        print(f"[EMBEDDER] Evicted job {job_id} index from memory")
+
+
+def _get_resident(job_id: int) -> dict:
+    """Return the in-memory entry for a job, loading it from disk on a miss.
+    Only takes _registry_lock: use _resident() to also lock the entry."""
+    global _registry_bytes
+    with _registry_lock:
+        entry = _registry.get(job_id)
+        if entry is not None:
+            _registry.move_to_end(job_id)
+            return entry
+
+        entry = _evicting.get(job_id)
+        if entry is None or entry["gone"]:
+            index, needs_save = load_index(job_id)
+            entry = _new_entry(job_id, index)
+            if needs_save:
+                entry["version"] = 1
+                _flush_event.set()
+        _registry[job_id] = entry
+        _registry_bytes += entry["nbytes"]
+        _evict_if_needed()
+        return entry
+
+
+@contextmanager
+def _resident(job_id: int):
+    """The job's entry with its lock held, retried if it was evicted meanwhile."""
+    while True:
+        entry = _get_resident(job_id)
+        with entry["lock"]:
+            if not entry["gone"]:
+                yield entry
+                return
+
+
+def _mark_dirty(job_id: int, entry: dict):
+    """Re-account memory for a changed entry and schedule a write-behind flush.
+    Caller must hold the entry lock."""
+    global _registry_bytes
+    with _registry_lock:
+        new_nbytes = _estimate_nbytes(entry["index"])
+        if _registry.get(job_id) is entry:
+            _registry_bytes += new_nbytes - entry["nbytes"]
+        entry["nbytes"] = new_nbytes
+        entry["version"] += 1
+        _flush_event.set()
+        _evict_if_needed()
+
+
+def _persist(job_id: int, entry: dict):
+    """Save an entry if it changed: serialized under its lock, written outside it."""
+    with entry["lock"]:
+        version = entry["version"]
+        if entry["gone"] or entry["index"] is None or version <= entry["saved"]:
+            return
+        data = faiss.serialize_index(entry["index"])
+        tombstones = np.array(sorted(entry["tombstones"]), dtype=np.int64)
+    # write_lock keeps writes of one job in order; an older snapshot never
+    # overwrites a newer one
+    with entry["write_lock"]:
+        if entry["gone"] or version <= entry["saved"]:
+            return
+        _write_index(job_id, data, tombstones)
+        entry["saved"] = version
+
+
+def flush_indexes():
+    """Persist every changed index, then release the evicted ones."""
+    with _registry_lock:
+        pending = list(_registry.items()) + list(_evicting.items())
+    for job_id, entry in pending:
+        _persist(job_id, entry)
+
+    with _registry_lock:
+        evicting = list(_evicting.items())
+    for job_id, entry in evicting:
+        with entry["lock"], _registry_lock:
+            if _evicting.get(job_id) is not entry:
+                continue
+            if _registry.get(job_id) is entry:
+                del _evicting[job_id]   # used again before its save finished
+            elif entry["version"] <= entry["saved"]:
+                del _evicting[job_id]
+                entry["gone"] = True
+            else:
+                _flush_event.set()      # changed during the save, next round
+
+
+def _flush_loop():
+    while True:
+        _flush_event.wait()
+        _flush_event.clear()
+        # Coalesce bursts of uploads into a single write per job
+        time.sleep(INDEX_FLUSH_INTERVAL_SECONDS)
+        try:
+            flush_indexes()
+        except Exception as e:
+            print(f"[EMBEDDER] Flush ERROR: {type(e).__name__}: {e}")
+            _flush_event.set()
 
 
-def save_index(job_id: int, index, meta):
-    faiss.write_index(index, _index_path(job_id))
-    with open(_meta_path(job_id), "wb") as f:
-        pickle.dump(meta, f)
+threading.Thread(target=_flush_loop, name="index-flusher", daemon=True).start()
+atexit.register(flush_indexes)
 
 
 def delete_index(job_id: int):
-    for path in [_index_path(job_id), _meta_path(job_id)]:
+    global _registry_bytes
+    with _registry_lock:
+        entries = [_registry.pop(job_id, None), _evicting.pop(job_id, None)]
+        if entries[0] is not None:
+            _registry_bytes -= entries[0]["nbytes"]
+    for entry in entries:
+        if entry is not None:
+            with entry["lock"]:
+                entry["gone"] = True
+            with entry["write_lock"]:
+                pass   # let a save already in flight land before the files go
+    for path in [_index_path(job_id), _tomb_path(job_id), _legacy_meta_path(job_id)]:
         if os.path.exists(path):
             os.remove(path)
+    ann_index.ExactVectors(_exact_path(job_id), 0).delete()
     print(f"[EMBEDDER] Deleted index for job {job_id}")
 
 
-def add_cv_to_index(job_id: int, cv_id: int, text: str):
-    index, meta = load_index(job_id)
+def _add_vectors(key: int, entry: dict, passage_ids: list[tuple[int, int]], vectors: np.ndarray) -> int:
+    """Add (owner_id, chunk) vectors to a resident index, skipping owners already present.
+    Caller must hold the entry lock. Returns the number of vectors added."""
+    keep = [i for i, (owner, _) in enumerate(passage_ids) if owner not in entry["chunks"]]
+    if not keep:
+        return 0
+    if entry["index"] is None:
+        entry["index"] = ann_index.empty_index(vectors.shape[1])
+    if any(passage_ids[i][0] in entry["tombstones"] for i in keep):
+        # A reused id: its old vectors must really be gone before new ones
+        # take the same ids (rare, so built right here). The snapshot holds
+        # everything, so a background build in flight is made stale.
+        entry["log"] = None
+        _install(key, entry, *_build(key, *_snapshot(entry)))
 
+    ids = np.array([_vector_id(*passage_ids[i]) for i in keep], dtype=np.int64)
+    entry["index"].add_with_ids(vectors[keep], ids)
+    if entry["exact"] is not None:
+        entry["exact"].append(ids, vectors[keep])
+    if entry["log"] is not None:
+        entry["log"].append((ids, vectors[keep]))
+    for i in keep:
+        owner = passage_ids[i][0]
+        entry["chunks"][owner] = entry["chunks"].get(owner, 0) + 1
+
+    _schedule_rebuild(entry)
+    _mark_dirty(key, entry)
+    return len(keep)
+
+
+def _stored_vectors(entry: dict, ids: np.ndarray) -> np.ndarray:
+    """
+    Exact vectors of ids in a resident index: from the ExactVectors sidecar
+    for ivfpq, from the index itself for the exact kinds. Only vectors of an
+    ivfpq index built before sidecars existed fall back to PQ reconstruction.
+    Caller must hold the entry lock.
+    """
+    if entry["exact"] is None:
+        return np.vstack([entry["index"].reconstruct(int(vid)) for vid in ids]).astype(np.float32)
+    vectors, missing = entry["exact"].get(ids)
+    for row in np.flatnonzero(missing):
+        vectors[row] = entry["index"].reconstruct(int(ids[row]))
+    return vectors
+
+
+def _tombstoned_ids(entry: dict) -> np.ndarray:
+    return np.array([
+        _vector_id(owner, chunk)
+        for owner, n_chunks in entry["tombstones"].items()
+        for chunk in range(n_chunks)
+    ], dtype=np.int64)
+
+
+def _schedule_rebuild(entry: dict):
+    """Ask the rebuild thread for a promotion, IVF retraining or compaction
+    when the index needs one and none is already building."""
+    index = entry["index"]
+    if index is None or entry["log"] is not None:
+        return
+    kind = ann_index.target_kind(index, entry["trained_on"])
+    if kind is None and sum(entry["tombstones"].values()) >= ANN_COMPACT_FRACTION * index.ntotal > 0:
+        kind = ann_index.index_kind(index)
+    if kind is not None:
+        entry["rebuild"] = kind
+        _rebuild_event.set()
+
+
+def _snapshot(entry: dict) -> tuple[str, np.ndarray, np.ndarray, set[int]]:
+    """(kind, ids, exact vectors, tombstoned owners left out) to rebuild from.
+    Caller must hold the entry lock."""
+    kind = entry["rebuild"] or ann_index.index_kind(entry["index"])
+    entry["rebuild"] = None
+    if entry["exact"] is not None:
+        ids = faiss.vector_to_array(entry["index"].id_map).astype(np.int64)
+        vectors = _stored_vectors(entry, ids) if len(ids) else np.zeros((0, entry["index"].d), dtype=np.float32)
+    else:
+        vectors, ids = ann_index.all_vectors(entry["index"])
+    dropped = set(entry["tombstones"])
+    if dropped:
+        keep = ~np.isin(ids >> CHUNK_ID_BITS, list(dropped))
+        vectors, ids = vectors[keep], ids[keep]
+    return kind, ids, vectors, dropped
+
+
+def _build(key: int, kind: str, ids: np.ndarray, vectors: np.ndarray, dropped: set[int]):
+    """Build a new index (and ivfpq sidecar, under a temporary name) from a
+    snapshot. Needs no lock: it touches nothing resident."""
+    if len(ids) < ANN_PROMOTION_THRESHOLD:
+        kind = "flat"
+    start = time.perf_counter()
+    index = ann_index.build_index(kind, vectors, ids)
+    exact = None
+    if kind == "ivfpq":
+        exact = ann_index.ExactVectors(_exact_path(key) + ".next", index.d)
+        exact.rewrite(ids, vectors)
+    print(f"[EMBEDDER] Rebuilt index {key} as {kind} ({len(ids)} vectors, "
+          f"{len(dropped)} removed CV(s) dropped) in {time.perf_counter() - start:.1f}s")
+    return index, exact, dropped
+
+
+def _install(key: int, entry: dict, index, exact, dropped: set[int]):
+    """Swap a built index in, replaying the vectors added since its snapshot.
+    Caller must hold the entry lock."""
+    for ids, vectors in entry["log"] or []:
+        index.add_with_ids(vectors, ids)
+        if exact is not None:
+            exact.append(ids, vectors)
+    entry["log"] = None
+    for owner in dropped:
+        del entry["tombstones"][owner]
+    if ann_index.supports_remove(index):
+        # CVs removed while it was building can go for real now
+        for owner in entry["tombstones"]:
+            index.remove_ids(faiss.IDSelectorRange(*_cv_id_range(owner)))
+        entry["tombstones"].clear()
+
+    if exact is not None:
+        exact.move_to(_exact_path(key))
+    elif entry["exact"] is not None:
+        entry["exact"].delete()
+    entry["index"], entry["exact"] = index, exact
+    entry["trained_on"] = index.ntotal
+    entry["generation"] += 1
+    _schedule_rebuild(entry)
+    _mark_dirty(key, entry)
+
+
+def _rebuild_in_background(key: int, entry: dict):
+    """Snapshot under the entry lock, build without it, swap in under it."""
+    with entry["lock"]:
+        if entry["gone"] or entry["rebuild"] is None:
+            return
+        kind, ids, vectors, dropped = _snapshot(entry)
+        generation = entry["generation"]
+        entry["log"] = []
+    index, exact, dropped = _build(key, kind, ids, vectors, dropped)
+    with entry["lock"]:
+        if entry["gone"] or entry["generation"] != generation:
+            # Deleted, evicted, or rebuilt in place meanwhile: this one is stale
+            if entry["generation"] == generation:
+                entry["log"] = None
+            if exact is not None:
+                exact.delete()
+            return
+        _install(key, entry, index, exact, dropped)
+
+
+_rebuilding = threading.Lock()   # held while the rebuild thread works
+_stopping = threading.Event()
+
+
+def _rebuild_loop():
+    while True:
+        _rebuild_event.wait()
+        _rebuild_event.clear()
+        with _registry_lock:
+            pending = [(key, entry) for key, entry in _registry.items() if entry["rebuild"]]
+        for key, entry in pending:
+            with _rebuilding:
+                if _stopping.is_set():
+                    return
+                try:
+                    _rebuild_in_background(key, entry)
+                except Exception as e:
+                    print(f"[EMBEDDER] Rebuild ERROR on index {key}: {type(e).__name__}: {e}")
+                    with entry["lock"]:
+                        entry["log"] = None
+
+
+def _stop_rebuilds():
+    # Let a build in flight finish (and be flushed) rather than killing the
+    # thread inside FAISS at interpreter exit
+    _stopping.set()
+    with _rebuilding:
+        pass
+
+
+threading.Thread(target=_rebuild_loop, name="index-rebuilder", daemon=True).start()
+atexit.register(_stop_rebuilds)   # runs before flush_indexes (atexit is LIFO)
+
+
+def _encode_passages(items: list[tuple[int, str]]) -> tuple[list[tuple[int, int]], np.ndarray]:
+    """(owner_id, text) → ([(owner_id, chunk)], vectors), encoded in batches."""
+    passages, passage_ids = [], []
+    for owner, text in items:
+        chunks = chunk_text(text) if EMBEDDING_CHUNKING else [text]
+        for i, chunk in enumerate(chunks):
+            passages.append(chunk)
+            passage_ids.append((owner, i))
+    return passage_ids, embed_texts(passages)
+
+
+def add_cv_to_index(job_id: int, cv_id: int, candidate_id: int, text: str):
+    add_cvs_to_index(job_id, [(cv_id, candidate_id, text)])
+
+
+def add_cvs_to_index(job_id: int, items: list[tuple[int, int, str]]):
+    """
+    Index (cv_id, candidate_id, text) triples for a job with a single index write.
+    Each distinct candidate is embedded once, into the talent pool; job
+    indexes receive copies of the pool vectors, so re-uploading the same
+    person to another job never re-encodes it.
+    With EMBEDDING_CHUNKING every CV contributes one vector per passage.
+    """
+    with _resident(job_id) as entry:
+        indexed = set(entry["chunks"])
+    with _resident(TALENT_POOL_KEY) as pool:
+        pooled = set(pool["chunks"])
     # Skip if already indexed
-    if any(m["cv_id"] == cv_id for m in meta):
-        print(f"[EMBEDDER] CV {cv_id} already in job {job_id} index, skipping.")
+    new_items = []
+    for cv_id, candidate_id, text in items:
+        if cv_id in indexed:
+            print(f"[EMBEDDER] CV {cv_id} already in job {job_id} index, skipping.")
+            continue
+        indexed.add(cv_id)
+        new_items.append((cv_id, candidate_id, text))
+
+    # Encode outside the lock only candidates the pool has never seen
+    to_encode = {}
+    for _, candidate_id, text in items:
+        if candidate_id not in pooled:
+            to_encode[candidate_id] = text
+    if not new_items and not to_encode:
         return
+    encoded = _encode_passages(list(to_encode.items())) if to_encode else None
 
-    vector = embed_text(text).reshape(1, -1)
-    dim = vector.shape[1]
+    with _resident(TALENT_POOL_KEY) as pool:
+        if encoded is not None:
+            _add_vectors(TALENT_POOL_KEY, pool, *encoded)
+        if not new_items:
+            return
+
+        passage_ids, pool_ids = [], []
+        for cv_id, candidate_id, _ in new_items:
+            for chunk in range(pool["chunks"].get(candidate_id, 0)):
+                passage_ids.append((cv_id, chunk))
+                pool_ids.append(_vector_id(candidate_id, chunk))
+        if not pool_ids:
+            return
+        vectors = _stored_vectors(pool, np.array(pool_ids, dtype=np.int64))
+    with _resident(job_id) as entry:
+        added = _add_vectors(job_id, entry, passage_ids, vectors)
+        total = entry["index"].ntotal
+    print(f"[EMBEDDER] {len(new_items)} CV(s) added to job {job_id} "
+          f"({added} vectors, {len(to_encode)} newly encoded). Total: {total}")
+
+
+def passage_vectors(candidate_ids: list[int]) -> dict[int, np.ndarray]:
+    """Stored passage vectors per candidate, read back from the talent pool."""
+    vectors = {}
+    with _resident(TALENT_POOL_KEY) as pool:
+        for candidate_id in candidate_ids:
+            n_chunks = pool["chunks"].get(candidate_id, 0)
+            if n_chunks:
+                vectors[candidate_id] = _stored_vectors(pool, np.array(
+                    [_vector_id(candidate_id, chunk) for chunk in range(n_chunks)], dtype=np.int64
+                ))
+    return vectors
 
-    if index is None:
-        index = faiss.IndexFlatIP(dim)
 
-    index.add(vector)
-    meta.append({"cv_id": cv_id})
-    save_index(job_id, index, meta)
-    print(f"[EMBEDDER] CV {cv_id} added to job {job_id}. Total: {index.ntotal}")
+def remove_cv_from_index(job_id: int, cv_id: int):
+    """Remove every vector of a CV from its job index."""
+    with _resident(job_id) as entry:
+        if cv_id not in entry["chunks"]:
+            return
+        removed = entry["chunks"].pop(cv_id)
+        if ann_index.supports_remove(entry["index"]) and entry["log"] is None:
+            entry["index"].remove_ids(faiss.IDSelectorRange(*_cv_id_range(cv_id)))
+        else:
+            # Filtered out of searches until the next rebuild drops it
+            entry["tombstones"][cv_id] = removed
+            _schedule_rebuild(entry)
+        _mark_dirty(job_id, entry)
+    print(f"[EMBEDDER] CV {cv_id} removed from job {job_id} ({removed} vectors)")
+
+
+def _aggregate(chunk_scores: list[float]) -> float:
+    """Collapse one CV's passage scores into a single score."""
+    ranked = sorted(chunk_scores, reverse=True)
+    if CHUNK_AGGREGATION == "mean_top_n":
+        top = ranked[:CHUNK_TOP_N]
+        return sum(top) / len(top)
+    return ranked[0]
+
+
+def _search(key: int, requirements_text: str, top_k: int,
+            owner_ids: list[int] | None = None,
+            query_vector: np.ndarray | None = None) -> list[tuple[int, float]]:
+    """Max-sim search over one resident index → [(owner_id, score)], best first.
+    owner_ids restricts the search to those owners' vectors (scored exactly
+    on ANN indexes when fewer than ANN_PROMOTION_THRESHOLD); query_vector
+    skips encoding requirements_text when it is already embedded."""
+    with _resident(key) as entry:
+        if entry["index"] is None or entry["index"].ntotal == 0:
+            return []
+
+    if query_vector is None:
+        query_vector = embed_text(requirements_text)
+    query_vector = query_vector.reshape(1, -1)
+
+    with _resident(key) as entry:
+        index = entry["index"]
+        if index is None or not entry["chunks"]:
+            return []
+        # Fetching top_k × (max passages per owner) vectors guarantees the
+        # top_k owners by max-sim are all present in the result.
+        max_chunks = max(entry["chunks"].values(), default=1)
+        k = min(top_k * max_chunks, index.ntotal)
+        params, ids = None, None
+        if owner_ids is not None:
+            allowed = np.array([
+                _vector_id(owner, chunk)
+                for owner in owner_ids
+                for chunk in range(entry["chunks"].get(owner, 0))
+            ], dtype=np.int64)
+            if len(allowed) == 0:
+                return []
+            if ann_index.index_kind(index) != "flat" and len(allowed) < ANN_PROMOTION_THRESHOLD:
+                # An ANN graph / inverted list walked under a filter loses
+                # allowed vectors; a set this small is scored exactly instead
+                scores = _stored_vectors(entry, allowed) @ query_vector[0]
+                scores, ids = scores.reshape(1, -1), allowed.reshape(1, -1)
+            else:
+                params = ann_index.search_params(
+                    index, faiss.IDSelectorBatch(allowed), k, len(allowed) / index.ntotal
+                )
+        elif entry["tombstones"]:
+            removed_ids = _tombstoned_ids(entry)
+            removed = faiss.IDSelectorBatch(removed_ids)
+            live = faiss.IDSelectorNot(removed)   # keeps `removed` referenced until the search
+            params = ann_index.search_params(index, live, k, 1.0 - len(removed_ids) / index.ntotal)
+        if ids is None:
+            scores, ids = index.search(query_vector, k, params=params)
+
+    per_owner: dict[int, list[float]] = defaultdict(list)
+    for score, vid in zip(scores[0], ids[0]):
+        if vid >= 0:
+            per_owner[int(vid) >> CHUNK_ID_BITS].append(float(score))
+
+    ranked = [(owner, _aggregate(chunk_scores)) for owner, chunk_scores in per_owner.items()]
+    ranked.sort(key=lambda r: r[1], reverse=True)
+    return ranked[:top_k]
 
 
 def search_similar_cvs(job_id: int, requirements_text: str, top_k: int = 20) -> list[dict]:
-    index, meta = load_index(job_id)
+    return [
+        {"cv_id": cv_id, "embedding_score": round(score, 4)}
+        for cv_id, score in _search(job_id, requirements_text, top_k)
+    ]
 
-    if index is None or index.ntotal == 0:
+
+def search_similar_cvs_batch(queries: list[tuple[int, str]], top_k: int = 20) -> list[list[dict]]:
+    """search_similar_cvs for many (job_id, requirements) at once, encoding every text in one batch."""
+    if not queries:
         return []
+    vectors = embed_texts([text for _, text in queries])
+    return [
+        [
+            {"cv_id": cv_id, "embedding_score": round(score, 4)}
+            for cv_id, score in _search(job_id, text, top_k, query_vector=vector)
+        ]
+        for (job_id, text), vector in zip(queries, vectors)
+    ]
+
 
-    query_vector = embed_text(requirements_text).reshape(1, -1)
-    top_k = min(top_k, index.ntotal)
-    scores, indices = index.search(query_vector, top_k)
-
-    results = []
-    for score, idx in zip(scores[0], indices[0]):
-        if idx < len(meta):
-            results.append({
-                "cv_id": meta[idx]["cv_id"],
-                "embedding_score": round(float(score), 4)
-            })
-    return results
\ No newline at end of file
+def search_talent_pool(requirements_text: str, top_k: int = 20,
+                       candidate_ids: list[int] | None = None) -> list[dict]:
+    """Search every candidate ever uploaded, optionally restricted to candidate_ids."""
+    return [
+        {"candidate_id": candidate_id, "embedding_score": round(score, 4)}
+        for candidate_id, score in _search(TALENT_POOL_KEY, requirements_text, top_k, candidate_ids)
+    ]
@@ -0,0 +1,213 @@
+"""
+Background CV ingestion queue.
+/cvs/upload only stores the PDF and enqueues an IngestionTask row; a small
+pool of worker threads claims queued tasks from SQLite and runs the heavy
+pipeline (PDF parsing, LLM skill/profile extraction, embedding).
+"""
+
+from sqlalchemy.orm import Session
+from datetime import datetime
+import json
+import os
+import threading
+import uuid
+
+from database import SessionLocal, CV, IngestionTask
+from services.parser import extract_text_from_pdf, extract_candidate_name, clean_text
+from services.skill_extractor import groq_executor, extract_skills_from_text, extract_cv_profile
+from services.profile_store import store_cv_profile
+from services.embedder import add_cv_to_index
+from services.talent_pool import pdf_content_hash, find_candidates, create_candidate, backfill_talent_pool
+from services.workers import pdf_executor, embedding_executor
+from config import INGESTION_WORKERS, INGESTION_POLL_SECONDS
+
+_wakeup = threading.Event()
+_started = False
+_job_locks: dict[int, threading.Lock] = {}
+_job_locks_guard = threading.Lock()
+
+
+class IngestionCancelled(Exception):
+    """The task's job was cleared while the task was running."""
+
+
+def job_lock(job_id: int) -> threading.Lock:
+    """
+    Serializes the last ingestion step of a job (CV insert + index add)
+    with DELETE /cvs/job/{job_id}, so a running task never re-creates
+    a CV or an index for a job that was just cleared.
+    """
+    with _job_locks_guard:
+        return _job_locks.setdefault(job_id, threading.Lock())
+
+
+def _task_is_running(db: Session, task_id: str) -> bool:
+    return db.query(IngestionTask.id).filter(
+        IngestionTask.id == task_id,
+        IngestionTask.status == "running"
+    ).first() is not None
+
+
+def enqueue_cv(db: Session, job_id: int, filename: str, file_path: str) -> IngestionTask:
+    task = IngestionTask(
+        id=uuid.uuid4().hex,
+        job_id=job_id,
+        filename=filename,
+        file_path=file_path,
+        status="queued"
+    )
+    db.add(task)
+    db.commit()
+    db.refresh(task)
+    _wakeup.set()
+    return task
+
+
+def has_pending_task(db: Session, job_id: int, filename: str) -> bool:
+    return db.query(IngestionTask).filter(
+        IngestionTask.job_id == job_id,
+        IngestionTask.filename == filename,
+        IngestionTask.status.in_(["queued", "running"])
+    ).first() is not None
+
+
+def ingest_cv_file(task_id: str, job_id: int, filename: str, file_path: str) -> int:
+    """
+    Full ingestion pipeline for one stored PDF. Returns the new CV id.
+    A PDF already in the talent pool skips parsing, LLM calls and encoding.
+    Raises IngestionCancelled if the task was cancelled before its CV was stored.
+    """
+    with open(file_path, "rb") as f:
+        content_hash = pdf_content_hash(f.read())
+
+    db = SessionLocal()
+    try:
+        candidate = find_candidates(db, [content_hash]).get(content_hash)
+        if candidate is None:
+            raw_text = pdf_executor.submit(extract_text_from_pdf, file_path).result()
+            if not raw_text.strip():
+                raise ValueError("Could not extract text from this PDF")
+
+            candidate_name = extract_candidate_name(raw_text)
+            raw_text = clean_text(raw_text)
+            # Skills + profile in parallel on the Groq pool
+            profile_future = groq_executor.submit(extract_cv_profile, raw_text)
+            skills = groq_executor.submit(extract_skills_from_text, raw_text).result()
+            candidate = create_candidate(
+                db, content_hash, filename, candidate_name, raw_text, json.dumps(skills)
+            )
+            store_cv_profile(db, raw_text, profile_future.result())
+        else:
+            print(f"[INGESTION] {filename} already in talent pool as candidate {candidate.id}")
+
+        with job_lock(job_id):
+            if not _task_is_running(db, task_id):
+                raise IngestionCancelled(f"Job {job_id} was cleared during ingestion")
+
+            cv = CV(
+                job_id=job_id,
+                filename=filename,
+                candidate_name=candidate.candidate_name,
+                raw_text=candidate.raw_text,
+                skills=candidate.skills,
+                candidate_id=candidate.id
+            )
+            db.add(cv)
+            db.commit()
+            db.refresh(cv)
+            cv_id = cv.id
+
+            # Add to job-specific FAISS index (and the talent pool if new)
+            embedding_executor.submit(add_cv_to_index, job_id, cv_id, candidate.id, cv.raw_text).result()
+        return cv_id
+    finally:
+        db.close()
+
+
+def _claim_next_task() -> IngestionTask | None:
+    """Atomically move the oldest queued task to 'running'."""
+    db = SessionLocal()
+    try:
+        while True:
+            task = db.query(IngestionTask).filter(
+                IngestionTask.status == "queued"
+            ).order_by(IngestionTask.created_at.asc()).first()
+            if task is None:
+                return None
+            claimed = db.query(IngestionTask).filter(
+                IngestionTask.id == task.id,
+                IngestionTask.status == "queued"
+            ).update({"status": "running", "started_at": datetime.utcnow()},
+                     synchronize_session=False)
+            db.commit()
+            if claimed:
+                db.refresh(task)
+                db.expunge(task)
+                return task
+    finally:
+        db.close()
+
+
+def _finish_task(task_id: str, status: str, cv_id: int | None = None, error: str | None = None):
+    """Close a running task; a task cancelled meanwhile keeps its 'cancelled' status."""
+    db = SessionLocal()
+    try:
+        db.query(IngestionTask).filter(
+            IngestionTask.id == task_id,
+            IngestionTask.status == "running"
+        ).update({
+            "status": status,
+            "cv_id": cv_id,
+            "error": error,
+            "finished_at": datetime.utcnow()
+        }, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _worker_loop():
+    while True:
+        task = _claim_next_task()
+        if task is None:
+            _wakeup.wait(INGESTION_POLL_SECONDS)
+            _wakeup.clear()
+            continue
+
+        print(f"[INGESTION] Task {task.id}: {task.filename} (job {task.job_id})")
+        try:
+            cv_id = ingest_cv_file(task.id, task.job_id, task.filename, task.file_path)
+            _finish_task(task.id, "done", cv_id=cv_id)
+            print(f"[INGESTION] Task {task.id} done → CV {cv_id}")
+        except IngestionCancelled:
+            print(f"[INGESTION] Task {task.id} cancelled")
+            if os.path.exists(task.file_path):
+                os.remove(task.file_path)
+        except Exception as e:
+            _finish_task(task.id, "failed", error=f"{type(e).__name__}: {e}")
+            print(f"[INGESTION] Task {task.id} ERROR: {type(e).__name__}: {e}")
+            if os.path.exists(task.file_path):
+                os.remove(task.file_path)
+
+
+def start_ingestion_workers():
+    """Requeue tasks interrupted by a restart and start the worker threads (once)."""
+    global _started
+    if _started:
+        return
+    _started = True
+
+    db = SessionLocal()
+    try:
+        db.query(IngestionTask).filter(IngestionTask.status == "running").update(
+            {"status": "queued", "started_at": None}, synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+
+    for i in range(INGESTION_WORKERS):
+        threading.Thread(target=_worker_loop, name=f"ingestion-{i}", daemon=True).start()
+    print(f"[INGESTION] {INGESTION_WORKERS} worker(s) started")
+
+    threading.Thread(target=backfill_talent_pool, name="talent-pool-backfill", daemon=True).start()
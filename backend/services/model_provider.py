@@ -0,0 +1,218 @@
+"""
+Shared model registry.
+Every sentence-transformers model the backend uses (CV embeddings, the
+reranker, tender scoring) is registered here and loaded lazily, once per
+process, on first use or by an optional background warm-up. Two names
+pointing at the same checkpoint share one instance, device and thread
+settings are applied in whichever process loads the model, and each
+model's memory footprint is reported alongside its load state.
+
+Each model runs on one inference backend: fp32 PyTorch, ONNX Runtime,
+or ONNX with int8 dynamic quantization. Callers only see the usual
+encode() / predict() interface, whichever backend is behind it.
+"""
+
+import os
+import threading
+import time
+from config import (
+    MODEL_DEVICE,
+    MODEL_TORCH_THREADS,
+    ONNX_MODELS_PATH,
+    ONNX_QUANTIZATION_CONFIG
+)
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+_torch_configured = False
+_torch_lock = threading.Lock()
+
+
+def _configure_torch():
+    """Apply per-process torch settings once, before the first model loads."""
+    global _torch_configured
+    with _torch_lock:
+        if _torch_configured:
+            return
+        if MODEL_TORCH_THREADS > 0:
+            import torch
+            torch.set_num_threads(MODEL_TORCH_THREADS)
+            print(f"[MODELS] torch intra-op threads set to {MODEL_TORCH_THREADS}")
+        _torch_configured = True
+
+
+def _footprint_bytes(model, onnx_file: str = None):
+    """
+    Bytes held by parameters and buffers of a torch-backed model; for ONNX
+    models the weights live inside the runtime, so the model file size is
+    reported instead.
+    """
+    if onnx_file:
+        return os.path.getsize(onnx_file) if os.path.exists(onnx_file) else None
+    module = getattr(model, "model", model)   # CrossEncoder wraps its nn.Module
+    if not hasattr(module, "parameters"):
+        return None
+    total = sum(p.numel() * p.element_size() for p in module.parameters())
+    total += sum(b.numel() * b.element_size() for b in module.buffers())
+    return total or None
+
+
+def _onnx_dir(model_id: str) -> str:
+    return os.path.join(ONNX_MODELS_PATH, model_id.replace("/", "__"))
+
+
+def _onnx_file(model_id: str) -> str | None:
+    """The model.onnx loaded for a local checkpoint or a hub id (from the HF cache)."""
+    local_file = os.path.join(model_id, "onnx", "model.onnx")
+    if os.path.exists(local_file):
+        return local_file
+    from huggingface_hub import try_to_load_from_cache
+    cached = try_to_load_from_cache(model_id, "onnx/model.onnx")
+    return cached if isinstance(cached, str) else None
+
+
+def _quantized_file_name() -> str:
+    return f"onnx/model_qint8_{ONNX_QUANTIZATION_CONFIG}.onnx"
+
+
+def load_with_backend(model_cls, model_id: str, backend: str):
+    """
+    Load a SentenceTransformer / CrossEncoder on the requested backend.
+    Returns (model, onnx_file) where onnx_file is None for torch.
+
+    "onnx-int8" exports the checkpoint to ONNX and quantizes it the first
+    time, into ONNX_MODELS_PATH; later loads reuse the exported file.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}', expected one of {BACKENDS}")
+
+    if backend == "torch":
+        return model_cls(model_id, device=MODEL_DEVICE), None
+
+    if backend == "onnx":
+        model = model_cls(model_id, backend="onnx", device=MODEL_DEVICE)
+        return model, _onnx_file(model_id)
+
+    local_dir = _onnx_dir(model_id)
+    file_name = _quantized_file_name()
+    quantized_path = os.path.join(local_dir, file_name)
+    if not os.path.exists(quantized_path):
+        from sentence_transformers import export_dynamic_quantized_onnx_model
+        print(f"[MODELS] Exporting {model_id} to int8 ONNX ({ONNX_QUANTIZATION_CONFIG}) in {local_dir}...")
+        os.makedirs(local_dir, exist_ok=True)
+        exported = model_cls(model_id, backend="onnx")
+        exported.save_pretrained(local_dir)
+        export_dynamic_quantized_onnx_model(exported, ONNX_QUANTIZATION_CONFIG, local_dir)
+
+    model = model_cls(
+        local_dir,
+        backend="onnx",
+        device=MODEL_DEVICE,
+        model_kwargs={"file_name": file_name}
+    )
+    return model, quantized_path
+
+
+class LazyModel:
+    def __init__(self, name: str, loader, model_id: str = None, backend: str = "torch"):
+        self.name = name
+        self.model_id = model_id
+        self.backend = backend
+        self._loader = loader
+        self._model = None
+        self._lock = threading.Lock()
+        self.state = "not_loaded"   # not_loaded / loading / ready / failed
+        self.error = None
+        self.load_seconds = None
+        self.memory_bytes = None
+
+    def get(self):
+        """Return the model, loading it exactly once across threads."""
+        if self._model is not None:
+            return self._model
+        with self._lock:
+            if self._model is None:
+                self.state = "loading"
+                print(f"Loading {self.name} model...")
+                start = time.perf_counter()
+                try:
+                    _configure_torch()
+                    loaded = self._loader()
+                    # Registry loaders return (model, onnx_file); plain ones just the model
+                    model, onnx_file = loaded if isinstance(loaded, tuple) else (loaded, None)
+                    self._model = model
+                except Exception as e:
+                    self.state = "failed"
+                    self.error = f"{type(e).__name__}: {e}"
+                    raise
+                self.load_seconds = round(time.perf_counter() - start, 2)
+                self.memory_bytes = _footprint_bytes(self._model, onnx_file)
+                self.state = "ready"
+                self.error = None
+                size = f", {self.memory_bytes / 2**20:.0f} MB" if self.memory_bytes else ""
+                print(f"{self.name.capitalize()} model loaded in {self.load_seconds}s ({self.backend}{size}).")
+        return self._model
+
+    def warm_up(self):
+        """Load in a background thread; failures are reported by status()."""
+        def _load():
+            try:
+                self.get()
+            except Exception as e:
+                print(f"[MODELS] Warm-up of {self.name} failed: {type(e).__name__}: {e}")
+        threading.Thread(target=_load, name=f"warmup-{self.name}", daemon=True).start()
+
+    def status(self) -> dict:
+        return {
+            "model_id": self.model_id,
+            "backend": self.backend,
+            "state": self.state,
+            "load_seconds": self.load_seconds,
+            "memory_mb": round(self.memory_bytes / 2**20, 1) if self.memory_bytes is not None else None,
+            "error": self.error
+        }
+
+
+_providers: dict[str, LazyModel] = {}
+_by_checkpoint: dict[tuple, LazyModel] = {}
+_registry_lock = threading.Lock()
+
+
+def _register_checkpoint(name: str, kind: str, model_id: str, backend: str, loader) -> LazyModel:
+    with _registry_lock:
+        if name in _providers:
+            return _providers[name]
+        shared = _by_checkpoint.get((kind, model_id, backend))
+        if shared is None:
+            shared = LazyModel(name, loader, model_id, backend)
+            _by_checkpoint[(kind, model_id, backend)] = shared
+        _providers[name] = shared
+        return shared
+
+
+def sentence_transformer(name: str, model_id: str, backend: str = "torch") -> LazyModel:
+    """Register a bi-encoder; names using the same checkpoint share it."""
+    def _load():
+        from sentence_transformers import SentenceTransformer
+        return load_with_backend(SentenceTransformer, model_id, backend)
+    return _register_checkpoint(name, "bi_encoder", model_id, backend, _load)
+
+
+def cross_encoder(name: str, model_id: str, backend: str = "torch") -> LazyModel:
+    """Register a cross-encoder; names using the same checkpoint share it."""
+    def _load():
+        from sentence_transformers import CrossEncoder
+        return load_with_backend(CrossEncoder, model_id, backend)
+    return _register_checkpoint(name, "cross_encoder", model_id, backend, _load)
+
+
+def models_status() -> dict[str, dict]:
+    return {name: provider.status() for name, provider in _providers.items()}
+
+
+def warm_up_models(names: list[str]):
+    for name in names:
+        if name in _providers:
+            _providers[name].warm_up()
+        else:
+            print(f"[MODELS] Unknown model '{name}' in MODEL_WARMUP, skipping.")
@@ -0,0 +1,90 @@
+"""
+Multi-pattern phrase matcher: Aho-Corasick over word tokens.
+A vocabulary of phrases is compiled once into an automaton; find() then
+reports every vocabulary phrase present in a text in one linear pass over
+its tokens, on word boundaries, however large the vocabulary is.
+"""
+
+from collections import deque
+import re
+import unicodedata
+
+# Words, keeping tech spellings whole: "node.js", "ci/cd", "m&a", "c++", "c#"
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[./&][a-z0-9]+)*[+#]*")
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase, accent-free word tokens; phrases and texts share this."""
+    if not text:
+        return []
+    text = unicodedata.normalize("NFD", text.lower())
+    text = "".join(c for c in text if unicodedata.category(c) != "Mn")
+    return _TOKEN_RE.findall(text)
+
+
+class PhraseMatcher:
+    def __init__(self, phrases: dict):
+        """phrases maps each phrase to the value reported when it matches."""
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list] = [[]]
+        self.size = 0
+
+        for phrase, value in phrases.items():
+            tokens = tokenize(phrase)
+            if not tokens:
+                continue
+            node = 0
+            for token in tokens:
+                child = self._goto[node].get(token)
+                if child is None:
+                    child = len(self._goto)
+                    self._goto[node][token] = child
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = child
+            self._out[node].append((len(tokens), value))
+            self.size += 1
+
+        # Failure links, breadth-first; each node also inherits the outputs
+        # of its failure node so overlapping phrases are all reported
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for token, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and token not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(token, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def find_iter(self, text: str):
+        """Yield (start_token, end_token, value) for every match, overlaps included."""
+        node = 0
+        for position, token in enumerate(tokenize(text)):
+            while node and token not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(token, 0)
+            for length, value in self._out[node]:
+                yield position - length + 1, position + 1, value
+
+    def find(self, text: str) -> list:
+        """
+        Distinct values of the leftmost-longest matches, in text order:
+        "amazon web services" is reported, not also "web" inside it.
+        """
+        matches = sorted(self.find_iter(text), key=lambda m: (m[0], m[0] - m[1]))
+        seen, found, covered_until = set(), [], 0
+        for start, end, value in matches:
+            if start < covered_until:
+                continue
+            covered_until = end
+            if value not in seen:
+                seen.add(value)
+                found.append(value)
+        return found
+
+    def contains_any(self, text: str) -> bool:
+        return next(self.find_iter(text), None) is not None
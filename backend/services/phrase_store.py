@@ -0,0 +1,107 @@
+"""
+Shared phrase-embedding store.
+Short phrases (skills, keywords, domains) recur across every candidate and
+request, so each one is embedded once with the CV embedding model and kept
+in a bounded in-memory LRU, backed by a PersistentCache namespace so the
+vectors survive restarts.
+"""
+
+from collections import OrderedDict
+import hashlib
+import threading
+
+import numpy as np
+
+from config import EMBEDDING_MODEL, EMBEDDING_BACKEND, PHRASE_MEMORY_MAX_ENTRIES, PHRASE_CACHE_MAX_ENTRIES
+from services.cache import PersistentCache
+from services.embedder import embed_texts
+
+
+def _phrase_key(phrase: str) -> str:
+    return hashlib.sha256(f"{EMBEDDING_MODEL}\x00{EMBEDDING_BACKEND}\x00{phrase}".encode("utf-8")).hexdigest()
+
+
+class PhraseEmbeddingStore:
+    def __init__(self, max_entries: int, persistent: PersistentCache):
+        self.max_entries = max_entries
+        self._persistent = persistent
+        self._vectors: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.encoded = 0
+
+    def embed(self, phrases: list[str]) -> np.ndarray:
+        """(len(phrases), dim) normalized vectors; only unseen phrases are encoded, in one batch."""
+        found: dict[str, np.ndarray] = {}
+        with self._lock:
+            for phrase in phrases:
+                vector = self._vectors.get(phrase)
+                if vector is not None:
+                    self._vectors.move_to_end(phrase)
+                    found[phrase] = vector
+            self.hits += sum(1 for p in phrases if p in found)
+            self.misses += sum(1 for p in phrases if p not in found)
+
+        missing = list(dict.fromkeys(p for p in phrases if p not in found))
+        if missing:
+            keys = {p: _phrase_key(p) for p in missing}
+            stored = self._persistent.get_many(list(keys.values()))
+            for phrase, key in keys.items():
+                if key in stored:
+                    found[phrase] = stored[key]
+            to_encode = [p for p in missing if p not in found]
+            if to_encode:
+                vectors = embed_texts(to_encode)
+                self._persistent.put_many({keys[p]: v for p, v in zip(to_encode, vectors)})
+                found.update(zip(to_encode, vectors))
+                self.encoded += len(to_encode)
+            self._remember({p: found[p] for p in missing})
+
+        if not phrases:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.vstack([found[p] for p in phrases]).astype(np.float32)
+
+    def _remember(self, vectors: dict[str, np.ndarray]):
+        with self._lock:
+            for phrase, vector in vectors.items():
+                self._vectors[phrase] = vector
+                self._vectors.move_to_end(phrase)
+            while len(self._vectors) > self.max_entries:
+                self._vectors.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "resident": len(self._vectors),
+            "max_resident": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "encoded": self.encoded,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "persistent": self._persistent.stats()
+        }
+
+
+phrase_store = PhraseEmbeddingStore(
+    PHRASE_MEMORY_MAX_ENTRIES,
+    PersistentCache(
+        "phrase_vectors",
+        PHRASE_CACHE_MAX_ENTRIES,
+        dumps=lambda v: np.asarray(v, dtype=np.float32).tobytes(),
+        loads=lambda b: np.frombuffer(b, dtype=np.float32)
+    )
+)
+
+
+def semantic_signal_matches(req_signals: list[str], cv_signals: list[str], threshold: float) -> list[bool]:
+    """
+    For each requirement signal, whether some CV signal is within cosine
+    `threshold` of it: one similarity matrix over all signal pairs.
+    """
+    if not req_signals or not cv_signals:
+        return [False] * len(req_signals)
+    req_vectors = phrase_store.embed(req_signals)
+    cv_vectors = phrase_store.embed(cv_signals)
+    similarities = req_vectors @ cv_vectors.T
+    return (similarities.max(axis=1) >= threshold).tolist()
@@ -0,0 +1,122 @@
+"""
+Persistent store for LLM-extracted CV profiles.
+A CV's text never changes after upload, so its profile is computed once
+and reused by every later /match/ call (and by identical CVs in other jobs).
+"""
+
+from concurrent.futures import FIRST_COMPLETED, wait
+from sqlalchemy.orm import Session
+import hashlib
+import json
+
+from database import CVProfile
+from config import GROQ_MODEL
+from services.skill_extractor import (
+    CV_PROFILE_PROMPT_VERSION,
+    groq_executor,
+    extract_cv_profile
+)
+
+
+def cv_profile_key(raw_text: str) -> str:
+    payload = f"{GROQ_MODEL}\x00{CV_PROFILE_PROMPT_VERSION}\x00{raw_text}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _is_empty_profile(profile: dict) -> bool:
+    """extract_cv_profile() returns an empty profile on LLM errors — never persist those."""
+    return not profile.get("domain") and not any(
+        profile.get(key) for key in ["skills", "experience_keywords", "project_keywords",
+                                     "certifications", "implied_capabilities"]
+    )
+
+
+def store_cv_profile(db: Session, raw_text: str, profile: dict):
+    store_cv_profiles(db, [raw_text], [profile])
+
+
+def store_cv_profiles(db: Session, raw_texts: list[str], profiles: list[dict]):
+    """Persist several profiles in one transaction."""
+    for raw_text, profile in zip(raw_texts, profiles):
+        if not _is_empty_profile(profile):
+            db.merge(CVProfile(profile_key=cv_profile_key(raw_text), profile=json.dumps(profile)))
+    db.commit()
+
+
+def _stored_profiles(db: Session, keys: list[str]) -> dict[str, dict]:
+    return {
+        row.profile_key: json.loads(row.profile)
+        for row in db.query(CVProfile).filter(CVProfile.profile_key.in_(set(keys))).all()
+    }
+
+
+def stored_cv_profiles(db: Session, raw_texts: list[str]) -> dict[int, dict]:
+    """Profiles already in the store → {index: profile}; never calls the LLM."""
+    keys = [cv_profile_key(t) for t in raw_texts]
+    stored = _stored_profiles(db, keys)
+    return {i: stored[key] for i, key in enumerate(keys) if key in stored}
+
+
+def iter_cv_profiles(db: Session, raw_texts: list[str], keep=None):
+    """
+    Iterate (index, profile) for every text as soon as its profile is known:
+    stored profiles first, then LLM extractions in completion order.
+    LLM calls are submitted immediately, before iteration starts, and each
+    fresh profile is persisted when it arrives.
+    keep(index) -> bool lets the caller drop texts whose profile it no
+    longer needs: their calls still waiting in the pool are cancelled and
+    yielded as (index, None).
+    """
+    keys = [cv_profile_key(t) for t in raw_texts]
+    stored = _stored_profiles(db, keys)
+
+    missing: dict[str, list[int]] = {}
+    for i, key in enumerate(keys):
+        if key not in stored:
+            missing.setdefault(key, []).append(i)
+    print(f"[PROFILES] {len(raw_texts) - sum(map(len, missing.values()))} cached, {len(missing)} to extract")
+
+    futures = {
+        groq_executor.submit(extract_cv_profile, raw_texts[indices[0]]): key
+        for key, indices in missing.items()
+    }
+    return _drain_profiles(db, keys, stored, missing, futures, keep)
+
+
+def _drain_profiles(db: Session, keys, stored, missing, futures, keep):
+    for i, key in enumerate(keys):
+        if key in stored:
+            yield i, stored[key]
+    remaining = set(futures)
+    while remaining:
+        if keep is not None:
+            # Checked before every wait, so each new result can prune the queue
+            for future in list(remaining):
+                key = futures[future]
+                if not any(keep(i) for i in missing[key]) and future.cancel():
+                    remaining.discard(future)
+                    for i in missing[key]:
+                        yield i, None
+            if not remaining:
+                break
+        done, remaining = wait(remaining, return_when=FIRST_COMPLETED)
+        for future in done:
+            key = futures[future]
+            profile = future.result()
+            if not _is_empty_profile(profile):
+                db.merge(CVProfile(profile_key=key, profile=json.dumps(profile)))
+                db.commit()
+            for i in missing[key]:
+                yield i, profile
+
+
+def get_cv_profiles(db: Session, raw_texts: list[str]) -> list[dict]:
+    """
+    Return one profile per text, in order.
+    Stored profiles are read from the DB; only the missing ones hit the LLM
+    (concurrently) and are persisted for next time.
+    """
+    profiles = [None] * len(raw_texts)
+    for i, profile in iter_cv_profiles(db, raw_texts):
+        profiles[i] = profile
+    return profiles
@@ -1,23 +1,148 @@
-from sentence_transformers import CrossEncoder
-from config import RERANKER_MODEL
+import hashlib
+import numpy as np
+from config import (
+    RERANKER_MODEL,
+    RERANKER_BACKEND,
+    RERANK_PASSAGE_SELECTION,
+    RERANK_MAX_PASSAGES,
+    CHUNK_SIZE_WORDS,
+    CHUNK_OVERLAP_WORDS,
+    MAX_CHUNKS_PER_CV,
+    RERANKER_CACHE_MAX_ENTRIES,
+    PASSAGE_CACHE_MAX_ENTRIES,
+    EMBEDDING_MODEL,
+    EMBEDDING_BACKEND
+)
+from services.cache import PersistentCache
+from services.model_provider import cross_encoder
+from services.embedder import chunk_text, embed_text, embed_texts, passage_vectors
 
-print("Loading reranker model...")
-reranker = CrossEncoder(RERANKER_MODEL)
-print("Reranker model loaded.")
+reranker = cross_encoder("reranker", RERANKER_MODEL, RERANKER_BACKEND)
 
+# Raw (un-normalized) logits per (requirements, CV text): normalization
+# depends on the whole candidate set, so it is applied after lookup
+logit_cache = PersistentCache("reranker_logits", RERANKER_CACHE_MAX_ENTRIES)
 
-def rerank_candidates(requirements: str, candidates: list[dict]) -> list[dict]:
-    if not candidates:
-        return []
+# Passage vectors per CV text for passage selection, when the talent pool
+# does not hold the same chunking (EMBEDDING_CHUNKING off): a CV's passages
+# are encoded once, not again for every new requirements text
+passage_cache = PersistentCache(
+    "passage_vectors",
+    PASSAGE_CACHE_MAX_ENTRIES,
+    dumps=lambda v: np.asarray(v, dtype=np.float32).tobytes(),
+    loads=lambda b: np.frombuffer(b, dtype=np.float32)
+)
+_PASSAGE_TAG = (
+    f"{EMBEDDING_MODEL}\x00{EMBEDDING_BACKEND}\x00{CHUNK_SIZE_WORDS}\x00"
+    f"{CHUNK_OVERLAP_WORDS}\x00{MAX_CHUNKS_PER_CV}"
+)
+
+# Anything that changes a logit for the same texts invalidates the cache,
+# including what picks the passages (_PASSAGE_TAG: embedding model, chunking)
+_SCORING_TAG = (
+    f"{RERANKER_MODEL}\x00{RERANKER_BACKEND}\x00{RERANK_PASSAGE_SELECTION}\x00"
+    f"{RERANK_MAX_PASSAGES}\x00{_PASSAGE_TAG}"
+)
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _logit_cache_key(requirements_hash: str, cv_text: str) -> str:
+    payload = f"{_SCORING_TAG}\x00{requirements_hash}\x00{_text_hash(cv_text)}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _passage_cache_key(cv_text: str) -> str:
+    return hashlib.sha256(f"{_PASSAGE_TAG}\x00{cv_text}".encode("utf-8")).hexdigest()
+
+
+def _select_passages(requirements: str, candidates: list[dict]) -> list[list[str]]:
+    """
+    The RERANK_MAX_PASSAGES chunks of each CV closest to the requirements,
+    by embedding similarity. Passage vectors are read back from the talent
+    pool when it holds the same chunking, then from passage_cache, and only
+    the rest are encoded (and cached).
+    """
+    if not RERANK_PASSAGE_SELECTION:
+        return [[c["raw_text"]] for c in candidates]
+    passages = [chunk_text(c["raw_text"]) for c in candidates]
+
+    long_cvs = [i for i, p in enumerate(passages) if len(p) > RERANK_MAX_PASSAGES]
+    if not long_cvs:
+        return passages
+
+    stored = passage_vectors([
+        candidates[i]["candidate_id"] for i in long_cvs
+        if candidates[i].get("candidate_id") is not None
+    ])
+    vectors, not_pooled = {}, []
+    for i in long_cvs:
+        vecs = stored.get(candidates[i].get("candidate_id"))
+        if vecs is not None and len(vecs) == len(passages[i]):
+            vectors[i] = vecs
+        else:
+            not_pooled.append(i)
+
+    keys = {i: _passage_cache_key(candidates[i]["raw_text"]) for i in not_pooled}
+    cached = passage_cache.get_many(list(keys.values()))
+    to_encode = []
+    for i in not_pooled:
+        flat = cached.get(keys[i])
+        if flat is not None and len(flat) % len(passages[i]) == 0:
+            vectors[i] = flat.reshape(len(passages[i]), -1)
+        else:
+            to_encode.append(i)
+    if to_encode:
+        encoded = embed_texts([p for i in to_encode for p in passages[i]])
+        offset = 0
+        for i in to_encode:
+            vectors[i] = encoded[offset:offset + len(passages[i])]
+            offset += len(passages[i])
+        passage_cache.put_many({keys[i]: vectors[i] for i in to_encode})
 
-    pairs = [(requirements, c["raw_text"]) for c in candidates]
-    scores = reranker.predict(pairs)
+    query = embed_text(requirements)
+    for i in long_cvs:
+        scores = vectors[i] @ query
+        keep = sorted(np.argsort(-scores)[:RERANK_MAX_PASSAGES])
+        passages[i] = [passages[i][k] for k in keep]
+    return passages
 
-    # Handle single candidate
-    if not hasattr(scores, '__len__'):
-        scores = [scores]
 
-    scores = [float(s) for s in scores]
+def _predict_logits(groups: list[tuple[str, list[dict]]]) -> list[list[float]]:
+    """
+    One predict() over every (requirements, passage) pair of every group,
+    max-pooled per CV → one list of raw logits per group.
+    """
+    group_passages = [_select_passages(requirements, candidates) for requirements, candidates in groups]
+    pairs = [
+        (requirements, p)
+        for (requirements, _), passages in zip(groups, group_passages)
+        for cv_passages in passages
+        for p in cv_passages
+    ]
+    if not pairs:
+        return [[] for _ in groups]
+    pair_scores = reranker.get().predict(pairs)
+
+    # Handle single pair
+    if not hasattr(pair_scores, '__len__'):
+        pair_scores = [pair_scores]
+
+    results, offset = [], 0
+    for passages in group_passages:
+        scores = []
+        for cv_passages in passages:
+            scores.append(max(float(s) for s in pair_scores[offset:offset + len(cv_passages)]))
+            offset += len(cv_passages)
+        results.append(scores)
+    return results
+
+
+def _normalize(candidates: list[dict], scores: list[float]) -> list[dict]:
+    if not candidates:
+        return []
 
     # If only 1 candidate, give it full score
     if len(scores) == 1:
@@ -33,4 +158,48 @@ def rerank_candidates(requirements: str, candidates: list[dict]) -> list[dict]:
         normalized = (scores[i] - min_s) / score_range
         candidate["reranker_score"] = round(normalized, 4)
 
-    return sorted(candidates, key=lambda x: x["reranker_score"], reverse=True)
\ No newline at end of file
+    return sorted(candidates, key=lambda x: x["reranker_score"], reverse=True)
+
+
+def rerank_batch(groups: list[tuple[str, list[dict], bool]]) -> list[list[dict]]:
+    """
+    Rerank several (requirements, candidates, use_cache) groups at once.
+    Only pairs missing from the logit cache reach the cross-encoder, all in
+    a single predict() call; normalization stays per group.
+    """
+    group_keys, cached = [], {}
+    for requirements, candidates, use_cache in groups:
+        requirements_hash = _text_hash(requirements)
+        keys = [_logit_cache_key(requirements_hash, c["raw_text"]) for c in candidates]
+        group_keys.append(keys)
+        if use_cache:
+            cached.update(logit_cache.get_many(keys))
+
+    missing = [
+        [i for i, key in enumerate(keys) if not use_cache or key not in cached]
+        for (_, _, use_cache), keys in zip(groups, group_keys)
+    ]
+    n_missing = sum(map(len, missing))
+    if n_missing:
+        fresh = _predict_logits([
+            (requirements, [candidates[i] for i in group_missing])
+            for (requirements, candidates, _), group_missing in zip(groups, missing)
+        ])
+        new_logits = {}
+        for keys, group_missing, logits in zip(group_keys, missing, fresh):
+            new_logits.update({keys[i]: logit for i, logit in zip(group_missing, logits)})
+        logit_cache.put_many(new_logits)
+        cached.update(new_logits)
+    n_total = sum(map(len, group_keys))
+    print(f"[RERANKER] {n_total - n_missing} cached / {n_missing} scored")
+
+    return [
+        _normalize(candidates, [cached[key] for key in keys])
+        for (_, candidates, _), keys in zip(groups, group_keys)
+    ]
+
+
+def rerank_candidates(requirements: str, candidates: list[dict], use_cache: bool = True) -> list[dict]:
+    if not candidates:
+        return []
+    return rerank_batch([(requirements, candidates, use_cache)])[0]
@@ -1,19 +1,74 @@
-from groq import Groq
-from config import GROQ_API_KEY, GROQ_MODEL
+from groq import Groq, RateLimitError, APIConnectionError, InternalServerError
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
+from functools import lru_cache
+from config import (
+    GROQ_API_KEY,
+    GROQ_MODEL,
+    GROQ_MAX_CONCURRENCY,
+    GROQ_MAX_RETRIES,
+    GROQ_BACKOFF_BASE_SECONDS,
+    REQUIREMENTS_CACHE_MAX_ENTRIES,
+    SKILL_EXTRACTION_MODE,
+    LEXICAL_MIN_SKILLS,
+    SKILL_MATCHING_MODE,
+    SEMANTIC_SKILL_THRESHOLD
+)
+from services.cache import PersistentCache
+from services.phrase_matcher import PhraseMatcher
+from services.tender_detector import SKILL_ALIASES
+import hashlib
 import json
+import random
 import re
+import time
 
 client = Groq(api_key=GROQ_API_KEY)
 
+# Bump when the extract_cv_profile prompt changes so stored profiles are recomputed
+CV_PROFILE_PROMPT_VERSION = "1"
+REQUIREMENTS_PROMPT_VERSION = "1"
+
+requirements_cache = PersistentCache("requirements_profile", REQUIREMENTS_CACHE_MAX_ENTRIES)
+
+# Shared, bounded pool for fanning out LLM calls (keeps us under Groq rate limits)
+groq_executor = ThreadPoolExecutor(
+    max_workers=GROQ_MAX_CONCURRENCY,
+    thread_name_prefix="groq"
+)
+
+
+def _retry_delay(error: Exception, attempt: int) -> float:
+    """Honour Retry-After when Groq sends it, else exponential backoff with jitter."""
+    response = getattr(error, "response", None)
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        try:
+            if retry_after is not None:
+                return float(retry_after)
+        except ValueError:
+            pass
+    return GROQ_BACKOFF_BASE_SECONDS * (2 ** attempt) + random.uniform(0, 0.5)
+
 
 def _call_groq(prompt: str, max_tokens: int = 1000) -> str:
-    """Single reusable Groq call."""
-    response = client.chat.completions.create(
-        model=GROQ_MODEL,
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.1,
-        max_tokens=max_tokens
-    )
+    """Single reusable Groq call, retried on rate limits and transient errors."""
+    for attempt in range(GROQ_MAX_RETRIES + 1):
+        try:
+            response = client.chat.completions.create(
+                model=GROQ_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.1,
+                max_tokens=max_tokens
+            )
+            break
+        except (RateLimitError, APIConnectionError, InternalServerError) as e:
+            if attempt == GROQ_MAX_RETRIES:
+                raise
+            delay = _retry_delay(e, attempt)
+            print(f"[Groq] {type(e).__name__}, retrying in {delay:.1f}s "
+                  f"({attempt + 1}/{GROQ_MAX_RETRIES})")
+            time.sleep(delay)
     raw = response.choices[0].message.content.strip()
     return re.sub(r"```json|```", "", raw).strip()
 
@@ -26,6 +81,36 @@ def _safe_list(value) -> list:
 
 
 def extract_skills_from_text(text: str) -> list[str]:
+    """
+    Skills for a CV according to SKILL_EXTRACTION_MODE:
+      llm     — Groq only
+      lexical — local dictionary matcher only
+      hybrid  — dictionary first; Groq only when it finds fewer than
+                LEXICAL_MIN_SKILLS specific (non-generic) skills, and both
+                results are merged
+    """
+    if SKILL_EXTRACTION_MODE == "llm":
+        return _extract_skills_llm(text)
+
+    skills = extract_skills_lexical(text)
+    if SKILL_EXTRACTION_MODE == "lexical":
+        return skills
+
+    # Everyday words like "research" say little about coverage
+    specific = sum(1 for skill in skills if skill not in _GENERIC_SKILL_NAMES)
+    if specific >= LEXICAL_MIN_SKILLS:
+        return skills
+
+    print(f"[SKILLS] Lexical coverage low ({specific} specific skills), asking the LLM")
+    seen = {s.casefold() for s in skills}
+    for skill in _extract_skills_llm(text):
+        if skill.casefold() not in seen:
+            seen.add(skill.casefold())
+            skills.append(skill)
+    return skills
+
+
+def _extract_skills_llm(text: str) -> list[str]:
     prompt = f"""
 You are an expert analyst with knowledge across all professional domains.
 
@@ -58,7 +143,24 @@ Text:
         return []
 
 
-def extract_requirements_profile(requirements_text: str) -> dict:
+def _requirements_cache_key(requirements_text: str) -> str:
+    normalized = " ".join(requirements_text.split()).casefold()
+    payload = f"{GROQ_MODEL}\x00{REQUIREMENTS_PROMPT_VERSION}\x00{normalized}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def extract_requirements_profile(requirements_text: str, use_cache: bool = True) -> dict:
+    """
+    Requirements profile, served from the persistent cache when the same
+    (whitespace/case-normalized) text was already profiled by this model + prompt.
+    use_cache=False skips the lookup but still refreshes the stored entry.
+    """
+    cache_key = _requirements_cache_key(requirements_text)
+    if use_cache:
+        cached = requirements_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
     prompt = f"""
 You are a senior analyst and recruiter with expertise across ALL professional domains.
 
@@ -106,6 +208,7 @@ Requirements text:
         profile = json.loads(raw)
         for key in ["required_skills", "keywords", "certifications", "implied_skills"]:
             profile[key] = _safe_list(profile.get(key, []))
+        requirements_cache.put(cache_key, profile)
         return profile
     except Exception as e:
         print(f"[Requirements extraction ERROR]: {type(e).__name__}: {e}")
@@ -323,7 +426,210 @@ SYNONYM_MAP: dict[str, list[str]] = {
 }
 
 
-def _check_synonyms(req_signal: str, cv_signals: set[str]) -> bool:
+# ─────────────────────────────────────────────────────
+# LOCAL LEXICAL EXTRACTION — no network
+# ─────────────────────────────────────────────────────
+# Display form of vocabulary phrases, or of single words inside a phrase
+# ("rest api" → "REST API"); other words stay lowercase, first one capitalized
+_DISPLAY_NAMES = {
+    # Acronyms
+    "3d": "3D", "ai": "AI", "api": "API", "apis": "APIs", "cad": "CAD",
+    "can": "CAN", "crm": "CRM", "css": "CSS", "ct": "CT", "dcf": "DCF",
+    "dns": "DNS", "ec2": "EC2", "es6": "ES6", "etl": "ETL", "fda": "FDA",
+    "fea": "FEA", "gaap": "GAAP", "gpt": "GPT", "html": "HTML", "http": "HTTP",
+    "ifrs": "IFRS", "ip": "IP", "iso": "ISO", "js": "JS", "llm": "LLM",
+    "lms": "LMS", "m&a": "M&A", "ml": "ML", "mri": "MRI", "oop": "OOP",
+    "orm": "ORM", "pcb": "PCB", "pmp": "PMP", "qa": "QA", "rest": "REST",
+    "rtos": "RTOS", "s3": "S3", "seo": "SEO", "solid": "SOLID", "sql": "SQL",
+    "tcp/ip": "TCP/IP", "ui": "UI", "vba": "VBA",
+    # Product and language names
+    "amazon": "Amazon", "angular": "Angular", "autocad": "AutoCAD",
+    "bash": "Bash", "bitbucket": "Bitbucket", "bloomberg": "Bloomberg",
+    "catia": "CATIA", "django": "Django", "docker": "Docker", "excel": "Excel",
+    "express": "Express", "fastapi": "FastAPI", "git": "Git", "github": "GitHub",
+    "gitlab": "GitLab", "google": "Google", "gradle": "Gradle",
+    "grafana": "Grafana", "graphql": "GraphQL", "hadoop": "Hadoop",
+    "heroku": "Heroku", "hibernate": "Hibernate", "hubspot": "HubSpot",
+    "java": "Java", "javascript": "JavaScript", "jest": "Jest", "jira": "Jira",
+    "junit": "JUnit", "kali": "Kali", "kanban": "Kanban", "linux": "Linux",
+    "matplotlib": "Matplotlib", "maven": "Maven", "metasploit": "Metasploit",
+    "mongodb": "MongoDB", "mysql": "MySQL", "nest.js": "NestJS",
+    "next.js": "Next.js", "node.js": "Node.js", "openai": "OpenAI",
+    "pandas": "pandas", "postgresql": "PostgreSQL", "powerbi": "Power BI",
+    "powerpoint": "PowerPoint", "prometheus": "Prometheus", "python": "Python",
+    "pytorch": "PyTorch", "react.js": "React", "salesforce": "Salesforce",
+    "scikit-learn": "scikit-learn", "scrum": "Scrum", "seaborn": "Seaborn",
+    "solidworks": "SolidWorks", "spark": "Spark", "tableau": "Tableau",
+    "tailwind": "Tailwind CSS", "tensorflow": "TensorFlow",
+    "typescript": "TypeScript", "ubuntu": "Ubuntu", "unix": "Unix",
+    "vercel": "Vercel", "vue": "Vue.js",
+    # Whole phrases
+    "docker swarm": "Docker Swarm", "github actions": "GitHub Actions",
+    "google ads": "Google Ads", "kali linux": "Kali Linux",
+    "six sigma": "Six Sigma", "spring boot": "Spring Boot",
+    "sql server": "SQL Server",
+}
+
+# Other spellings of vocabulary phrases, found as the phrase they stand for
+_SPELLINGS = {
+    "react": "react.js",
+    "reactjs": "react.js",
+    "nodejs": "node.js",
+    "nextjs": "next.js",
+    "nestjs": "nest.js",
+    "vuejs": "vue",
+    "vue.js": "vue",
+    "postgres": "postgresql",
+    "power bi": "powerbi",
+    "tailwind css": "tailwind",
+    "scikit learn": "scikit-learn",
+}
+
+
+def _display_name(phrase: str) -> str:
+    """One display form per vocabulary phrase: "aws" → "AWS", "machine learning" → "Machine learning"."""
+    if phrase in SKILL_ALIASES:
+        return SKILL_ALIASES[phrase]
+    if phrase in _DISPLAY_NAMES:
+        return _DISPLAY_NAMES[phrase]
+    words = phrase.split()
+    if not words:
+        return phrase
+    shown = [_DISPLAY_NAMES.get(w, w) for w in words]
+    if shown[0] == words[0]:
+        shown[0] = shown[0][:1].upper() + shown[0][1:]
+    return " ".join(shown)
+
+
+# Product names that are also everyday words ("express interest", "a spark
+# of", "excel at"): only found when written capitalized, as names are
+_CASED_TERMS = {"excel", "express", "jest", "spark", "vue"}
+
+# Vocabulary words common in any CV's prose: still reported, but not
+# counted as lexical coverage in hybrid mode
+_GENERIC_SKILLS = {
+    "analysis", "automation", "budgeting", "cloud", "coaching",
+    "collaboration", "communication", "communications", "compliance",
+    "container", "coordination", "database", "delivery", "documentation",
+    "education", "efficiency", "facilitation", "forecasting", "governance",
+    "infrastructure", "innovation", "leadership", "logging", "management",
+    "marketing", "mediation", "mentoring", "methodology", "modeling",
+    "monitoring", "negotiation", "networking", "organization", "partnership",
+    "pipeline", "planning", "presentation", "prioritization", "production",
+    "programming", "reporting", "research", "roadmap", "sales", "security",
+    "sprint", "stakeholders", "storytelling", "strategy", "surveys", "tax",
+    "teaching", "teamwork", "testing", "trading", "training", "trial",
+    "writing",
+}
+
+
+def _lexical_vocabulary() -> dict[str, str]:
+    """Every SYNONYM_MAP term, tender SKILL_ALIASES key and known spelling, mapped to its display name."""
+    phrases = {}
+    for term, synonyms in SYNONYM_MAP.items():
+        for phrase in [term, *synonyms]:
+            phrases.setdefault(phrase, phrase)
+    phrases.update((alias, alias) for alias in SKILL_ALIASES)
+    phrases.update(_SPELLINGS)
+    return {phrase: _display_name(canonical) for phrase, canonical in phrases.items()}
+
+
+_vocabulary = _lexical_vocabulary()
+skill_matcher = PhraseMatcher({
+    phrase: name for phrase, name in _vocabulary.items() if phrase not in _CASED_TERMS
+})
+_cased_term_re = re.compile(
+    r"\b(" + "|".join(sorted(term.capitalize() for term in _CASED_TERMS)) + r")\b"
+)
+_GENERIC_SKILL_NAMES = frozenset(_vocabulary[phrase] for phrase in _GENERIC_SKILLS if phrase in _vocabulary)
+
+
+def extract_skills_lexical(text: str) -> list[str]:
+    """Dictionary skills found in the text, in milliseconds and without Groq."""
+    skills = skill_matcher.find(text)
+    for match in _cased_term_re.finditer(text or ""):
+        name = _vocabulary[match.group(1).lower()]
+        if name not in skills:
+            skills.append(name)
+    return skills
+
+
+# ─────────────────────────────────────────────────────
+# PRECOMPILED SYNONYM GRAPH
+# ─────────────────────────────────────────────────────
+# Forward edges (term → its synonyms) and the inverse (synonym → terms
+# listing it), built once at import. Per requirement signal, the set of
+# terms whose synonym lists relate to it is computed once and cached, so
+# scoring a candidate is set intersections plus one C-level substring
+# lookup per signal instead of nested Python loops.
+_SYNONYMS: dict[str, tuple[str, ...]] = {
+    term: tuple(synonyms) for term, synonyms in SYNONYM_MAP.items()
+}
+_LISTED_UNDER: dict[str, frozenset[str]] = {}
+for _term, _synonyms in SYNONYM_MAP.items():
+    for _synonym in _synonyms:
+        _LISTED_UNDER[_synonym] = _LISTED_UNDER.get(_synonym, frozenset()) | {_term}
+
+
+@lru_cache(maxsize=20000)
+def _reverse_terms(req_lower: str) -> frozenset[str]:
+    """Terms whose synonym list contains req_lower, or a substring / superstring of it."""
+    related = set(_LISTED_UNDER.get(req_lower, ()))
+    for term, synonyms in _SYNONYMS.items():
+        if term not in related and any(req_lower in syn or syn in req_lower for syn in synonyms):
+            related.add(term)
+    return frozenset(related)
+
+
+class _SignalIndex:
+    """One candidate's CV signals, indexed for substring and word-overlap queries."""
+
+    def __init__(self, cv_signals: set[str]):
+        self.signals = cv_signals
+        self.listed = list(cv_signals)
+        # "x in any signal" is one search over the joined signals
+        self._joined = "\x00".join(self.listed)
+        # Trigram inverted list: first 3 characters → signals starting with
+        # them; shorter signals are checked one by one
+        self._by_trigram: dict[str, list[str]] = {}
+        self._short = []
+        # Token-level inverted list: word → indexes of signals containing it
+        self._postings: dict[str, list[int]] = {}
+        for i, signal in enumerate(self.listed):
+            if len(signal) < 3:
+                self._short.append(signal)
+            else:
+                self._by_trigram.setdefault(signal[:3], []).append(signal)
+            for word in set(signal.split()):
+                self._postings.setdefault(word, []).append(i)
+
+    def _signal_in(self, text: str) -> bool:
+        """True if some signal is a substring of text: only signals sharing its trigrams are checked."""
+        if any(signal in text for signal in self._short):
+            return True
+        trigrams = {text[i:i + 3] for i in range(len(text) - 2)}
+        return any(
+            signal in text
+            for trigram in trigrams.intersection(self._by_trigram)
+            for signal in self._by_trigram[trigram]
+        )
+
+    def related_substring(self, text: str) -> bool:
+        """True if text is a substring of some signal, or some signal is a substring of text."""
+        if "\x00" in text:
+            if any(text in s for s in self.listed):
+                return True
+        elif text in self._joined:
+            return True
+        return self._signal_in(text)
+
+    def word_overlap(self, req_words: set[str]) -> bool:
+        """True if some signal shares at least half of req_words."""
+        counts = Counter(i for word in req_words for i in self._postings.get(word, ()))
+        return any(n / max(len(req_words), 1) >= 0.5 for n in counts.values())
+
+
+def _check_synonyms(req_signal: str, cv_index: _SignalIndex) -> bool:
     """
     Universal semantic synonym check.
     Works across all professional domains.
@@ -331,20 +637,11 @@ def _check_synonyms(req_signal: str, cv_signals: set[str]) -> bool:
     req_lower = req_signal.lower().strip()
 
     # Direct synonym lookup
-    synonyms = SYNONYM_MAP.get(req_lower, [])
-    for synonym in synonyms:
-        if any(synonym in cv_s or cv_s in synonym for cv_s in cv_signals):
-            return True
+    if any(cv_index.related_substring(synonym) for synonym in _SYNONYMS.get(req_lower, ())):
+        return True
 
     # Reverse lookup — check if any cv_signal maps to req_signal
-    for cv_s in cv_signals:
-        cv_synonyms = SYNONYM_MAP.get(cv_s, [])
-        if req_lower in cv_synonyms:
-            return True
-        if any(req_lower in syn or syn in req_lower for syn in cv_synonyms):
-            return True
-
-    return False
+    return not cv_index.signals.isdisjoint(_reverse_terms(req_lower))
 
 
 def compute_full_profile_score(
@@ -354,7 +651,9 @@ def compute_full_profile_score(
     """
     Universal semantic scoring.
     Works for any professional domain.
-    Uses 4 matching strategies + synonym map + domain bonus.
+    Uses 4 matching strategies + synonym map + domain bonus; with
+    SKILL_MATCHING_MODE semantic / hybrid, embedding similarity replaces /
+    extends the string strategies.
     """
 
     # Build CV signal pool — strings only
@@ -379,31 +678,35 @@ def compute_full_profile_score(
 
     matched = []
     missing = []
+    cv_index = _SignalIndex(cv_signals) if cv_signals else None
+
+    # Strategy 5: embedding similarity, one matrix for all signal pairs
+    semantic = {}
+    if SKILL_MATCHING_MODE in ("semantic", "hybrid") and cv_signals:
+        from services.phrase_store import semantic_signal_matches
+        req_list = list(req_signals)
+        semantic = dict(zip(req_list, semantic_signal_matches(
+            req_list, list(cv_signals), SEMANTIC_SKILL_THRESHOLD
+        )))
 
     for req_signal in req_signals:
+        if cv_index is None:
+            missing.append(req_signal)
+            continue
+        if SKILL_MATCHING_MODE == "semantic":
+            (matched if semantic[req_signal] else missing).append(req_signal)
+            continue
         req_words = set(req_signal.split())
 
         # Strategy 1: Exact match
-        exact = req_signal in cv_signals
-
         # Strategy 2: Substring match
-        substring = any(
-            req_signal in cv_s or cv_s in req_signal
-            for cv_s in cv_signals
-        )
-
         # Strategy 3: Word overlap (50%+ words in common)
-        word_overlap = False
-        if len(req_words) > 1:
-            word_overlap = any(
-                len(req_words & set(cv_s.split())) / max(len(req_words), 1) >= 0.5
-                for cv_s in cv_signals
-            )
-
         # Strategy 4: Universal synonym map
-        synonym_match = _check_synonyms(req_signal, cv_signals)
-
-        if exact or substring or word_overlap or synonym_match:
+        if (req_signal in cv_signals
+                or cv_index.related_substring(req_signal)
+                or (len(req_words) > 1 and cv_index.word_overlap(req_words))
+                or _check_synonyms(req_signal, cv_index)
+                or semantic.get(req_signal, False)):
             matched.append(req_signal)
         else:
             missing.append(req_signal)
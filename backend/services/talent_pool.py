@@ -0,0 +1,107 @@
+"""
+Deduplicated, cross-job talent pool.
+Every distinct PDF (by content hash) becomes one Candidate row; uploading
+the same file to another job reuses its parsed text, skills, LLM profile
+and embedding instead of paying for them again.
+"""
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+import hashlib
+import os
+
+from database import SessionLocal, CV, Candidate
+from services.embedder import add_cvs_to_index
+from config import CVS_PATH
+
+
+def pdf_content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def find_candidates(db: Session, content_hashes: list[str]) -> dict[str, Candidate]:
+    if not content_hashes:
+        return {}
+    rows = db.query(Candidate).filter(Candidate.content_hash.in_(set(content_hashes))).all()
+    return {row.content_hash: row for row in rows}
+
+
+def create_candidate(db: Session, content_hash: str, filename: str,
+                     candidate_name: str, raw_text: str, skills_json: str) -> Candidate:
+    """Insert a candidate, or return the existing one if another worker won the race."""
+    candidate = Candidate(
+        content_hash=content_hash,
+        filename=filename,
+        candidate_name=candidate_name,
+        raw_text=raw_text,
+        skills=skills_json
+    )
+    db.add(candidate)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return find_candidates(db, [content_hash])[content_hash]
+    db.refresh(candidate)
+    return candidate
+
+
+def create_candidates(db: Session, rows: list[dict]) -> dict[str, Candidate]:
+    """Insert many candidates in one transaction → {content_hash: Candidate}."""
+    candidates = [
+        Candidate(
+            content_hash=row["content_hash"],
+            filename=row["filename"],
+            candidate_name=row["candidate_name"],
+            raw_text=row["raw_text"],
+            skills=row["skills_json"]
+        )
+        for row in rows
+    ]
+    db.add_all(candidates)
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent upload inserted one of them — fall back to row by row
+        db.rollback()
+        return {
+            row["content_hash"]: create_candidate(
+                db, row["content_hash"], row["filename"], row["candidate_name"],
+                row["raw_text"], row["skills_json"]
+            )
+            for row in rows
+        }
+    for candidate in candidates:
+        db.refresh(candidate)
+    return {candidate.content_hash: candidate for candidate in candidates}
+
+
+def backfill_talent_pool():
+    """Attach CVs uploaded before the talent pool existed to candidates and pool vectors."""
+    db = SessionLocal()
+    try:
+        orphans = db.query(CV).filter(CV.candidate_id.is_(None)).all()
+        if not orphans:
+            return
+        print(f"[TALENT POOL] Backfilling {len(orphans)} CV(s)...")
+        by_job: dict[int, list[tuple[int, int, str]]] = {}
+        for cv in orphans:
+            file_path = os.path.join(CVS_PATH, f"job{cv.job_id}_{cv.filename}")
+            if os.path.exists(file_path):
+                with open(file_path, "rb") as f:
+                    content_hash = pdf_content_hash(f.read())
+            else:
+                content_hash = pdf_content_hash(cv.raw_text.encode("utf-8"))
+            candidate = find_candidates(db, [content_hash]).get(content_hash) or create_candidate(
+                db, content_hash, cv.filename, cv.candidate_name, cv.raw_text, cv.skills
+            )
+            cv.candidate_id = candidate.id
+            by_job.setdefault(cv.job_id, []).append((cv.id, candidate.id, cv.raw_text))
+        db.commit()
+    finally:
+        db.close()
+
+    # CVs already in their job index are skipped; only the pool is filled
+    for job_id, items in by_job.items():
+        add_cvs_to_index(job_id, items)
+    print("[TALENT POOL] Backfill done.")
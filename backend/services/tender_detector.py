@@ -9,7 +9,14 @@ import unicodedata
 import json
 import os
 import csv
+import hashlib
+from functools import lru_cache
 from typing import List, Optional
+import numpy as np
+from config import TENDER_EMBEDDING_MODEL, TENDER_BACKEND
+from services.model_provider import sentence_transformer
+
+tender_model = sentence_transformer("tender", TENDER_EMBEDDING_MODEL, TENDER_BACKEND)
 
 # ─── Skill aliases ────────────────────────────────────────────────────────────
 SKILL_ALIASES = {
@@ -186,6 +193,7 @@ def normalize_tender_row(row: dict) -> dict:
         "days_to_deadline": days_to_deadline(row.get("submission_deadline", "")),
     }
     tender["tender_text"] = build_tender_text(tender)
+    tender["matching_text"] = tender_matching_text(tender)
     return tender
 
 
@@ -211,43 +219,39 @@ def load_tenders_from_csv(csv_path: str) -> List[dict]:
 
 # ─── Scoring ─────────────────────────────────────────────────────────────────
 
-def compute_scores(profile: dict, tenders: List[dict]) -> List[dict]:
-    """
-    Lazy-import sentence-transformers so the module can be imported
-    without model download at startup. Scores are computed on first call.
-    """
+def tender_text_key(text: str) -> str:
+    """Changes whenever a stored embedding of `text` would be stale."""
+    payload = f"{TENDER_EMBEDDING_MODEL}\x00{TENDER_BACKEND}\x00{text}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def encode_tenders(texts: List[str]) -> np.ndarray:
+    """(len(texts), dim) normalized float32 vectors from the tender model."""
     try:
-        from sentence_transformers import SentenceTransformer
-        import numpy as np
+        model = tender_model.get()
     except ImportError:
         raise RuntimeError("sentence-transformers is not installed. Run: pip install sentence-transformers")
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.asarray(model.encode(texts, normalize_embeddings=True), dtype=np.float32)
 
-    model = SentenceTransformer("sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
 
-    company_text = profile["profile_text"]
-    company_vec = model.encode([company_text], normalize_embeddings=True)
-
-    tender_texts = [t["tender_text"] for t in tenders]
-    tender_vecs = model.encode(tender_texts, normalize_embeddings=True)
-
-    sims = np.dot(tender_vecs, company_vec[0])
+def tender_matching_text(tender: dict) -> str:
+    """Normalized description + skills that excluded domains are matched against."""
+    return normalize_for_matching(
+        tender.get("project_description", "") + " " +
+        " ".join(tender.get("required_skills_display", []))
+    )
 
-    scored = []
-    for i, tender in enumerate(tenders):
-        t = dict(tender)
-        t["semantic_score"] = round(float(sims[i]) * 100, 2)
-        t["semantic_similarity"] = round(float(sims[i]), 4)
-        scored.append(t)
 
-    scored.sort(key=lambda x: x["semantic_score"], reverse=True)
-    return scored
+@lru_cache(maxsize=8)
+def _compile_exclusions(excluded_domains: tuple) -> Optional[re.Pattern]:
+    forms = {normalize_for_matching(d) for d in excluded_domains} - {""}
+    if not forms:
+        return None
+    return re.compile("|".join(re.escape(f) for f in sorted(forms)))
 
 
-def is_excluded(tender: dict, profile: dict) -> bool:
-    """Check if a tender's skills/description match any excluded domain."""
-    excluded = [normalize_for_matching(d) for d in profile.get("excluded_domains", [])]
-    text = normalize_for_matching(
-        tender.get("project_description", "") + " " +
-        " ".join(tender.get("required_skills_display", []))
-    )
-    return any(excl in text for excl in excluded if excl)
+def exclusion_pattern(profile: dict) -> Optional[re.Pattern]:
+    """All excluded domains of the profile as one compiled pattern (None if there are none)."""
+    return _compile_exclusions(tuple(profile.get("excluded_domains", [])))
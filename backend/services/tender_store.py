@@ -0,0 +1,244 @@
+"""
+SQLite tender catalogue.
+tenders.csv is upserted in bulk into the tenders table. Each row keeps its
+embedding (valid while its text_key is unchanged), so a sync only encodes
+new or edited tenders, and the score and exclusion flag live in indexed
+columns that the /tenders endpoints filter, sort and paginate in SQL.
+"""
+
+from datetime import date, datetime, timedelta
+from sqlalchemy import case, func, or_
+from sqlalchemy.orm import Session
+import hashlib
+import json
+
+import numpy as np
+
+from database import Tender
+from services.tender_detector import (
+    tender_text_key,
+    encode_tenders,
+    exclusion_pattern,
+    load_tenders_from_csv
+)
+
+_SCORE_BATCH  = 2000   # rows encoded / rescored per round trip
+_DELETE_BATCH = 500    # ids per IN (...) delete, below SQLite's variable limit
+
+
+def tender_key(t: dict) -> str:
+    """Identity of a tender across CSV loads; its other fields may change."""
+    payload = f"{t['issuing_authority']}\x00{t['title']}\x00{t['publication_date']}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _parse_date(value: str) -> date | None:
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_row(t: dict, now: datetime) -> dict:
+    return {
+        "tender_key": tender_key(t),
+        "issuing_authority": t["issuing_authority"],
+        "title": t["title"],
+        "project_description": t["project_description"],
+        "required_skills": json.dumps(t["required_skills_display"]),
+        "publication_date": t["publication_date"],
+        "submission_deadline": t["submission_deadline"],
+        "deadline": _parse_date(t["submission_deadline"]),
+        "contract_duration_months": t.get("contract_duration_months"),
+        "budget_currency": t.get("budget_currency"),
+        "budget_min": t.get("budget_min"),
+        "budget_max": t.get("budget_max"),
+        "tender_text": t["tender_text"],
+        "matching_text": t["matching_text"],
+        "text_key": tender_text_key(t["tender_text"]),
+        "updated_at": now
+    }
+
+
+def _csv_rows(csv_path: str) -> dict[str, dict]:
+    now = datetime.utcnow()
+    rows = {}
+    for t in load_tenders_from_csv(csv_path):
+        row = _to_row(t, now)
+        rows[row["tender_key"]] = row   # last duplicate in the CSV wins
+    return rows
+
+
+def _stored(db: Session) -> dict[str, tuple]:
+    """tender_key → (id, text_key, matching_text, has_embedding) for every stored row."""
+    return {
+        key: (row_id, text_key, matching_text, has_embedding)
+        for row_id, key, text_key, matching_text, has_embedding in db.query(
+            Tender.id, Tender.tender_key, Tender.text_key, Tender.matching_text,
+            Tender.embedding.isnot(None)
+        )
+    }
+
+
+def _stale(rows: dict[str, dict], stored: dict[str, tuple]) -> list[dict]:
+    """CSV rows that are new, edited, or stored without an embedding."""
+    return [
+        row for key, row in rows.items()
+        if key not in stored or stored[key][1] != row["text_key"] or not stored[key][3]
+    ]
+
+
+def _encode_rows(rows: list[dict]):
+    """Attach an embedding to each row, _SCORE_BATCH texts per encode() call."""
+    for i in range(0, len(rows), _SCORE_BATCH):
+        chunk = rows[i:i + _SCORE_BATCH]
+        for row, vector in zip(chunk, encode_tenders([r["tender_text"] for r in chunk])):
+            row["embedding"] = vector.tobytes()
+
+
+def upsert_tenders(db: Session, rows: dict[str, dict]) -> dict:
+    """
+    Make the table hold exactly `rows`: bulk insert new tenders, update
+    edited ones and delete those no longer listed. Rows that need a new
+    embedding are expected to carry it already (see sync_tenders); unchanged
+    rows are not touched, except to fill a missing matching_text.
+    Does not commit.
+    """
+    stored = _stored(db)
+    # Only non-empty if another process changed the table since the caller encoded
+    late = [row for row in _stale(rows, stored) if "embedding" not in row]
+    _encode_rows(late)
+
+    inserts, updates = [], []
+    for key, row in rows.items():
+        if key not in stored:
+            inserts.append(row)
+            continue
+        row_id, _, matching_text, _ = stored[key]
+        if "embedding" in row or matching_text is None:
+            updates.append({**row, "id": row_id})
+
+    removed = [row_id for key, (row_id, *_) in stored.items() if key not in rows]
+
+    db.bulk_insert_mappings(Tender, inserts)
+    db.bulk_update_mappings(Tender, updates)
+    for i in range(0, len(removed), _DELETE_BATCH):
+        db.query(Tender).filter(Tender.id.in_(removed[i:i + _DELETE_BATCH])).delete(synchronize_session=False)
+    return {
+        "inserted": len(inserts),
+        "updated": len(updates),
+        "removed": len(removed),
+        "unchanged": len(rows) - len(inserts) - len(updates),
+        "late_encoded": len(late)
+    }
+
+
+def rescore_tenders(db: Session, profile: dict, company_vec: np.ndarray) -> int:
+    """
+    Score and exclusion flag of every row against the profile, from the
+    stored embedding and matching_text: no text is encoded or normalized here.
+    """
+    excluded = exclusion_pattern(profile)
+
+    last_id, total = 0, 0
+    while True:
+        chunk = db.query(
+            Tender.id, Tender.embedding, Tender.matching_text
+        ).filter(Tender.id > last_id).order_by(Tender.id).limit(_SCORE_BATCH).all()
+        if not chunk:
+            return total
+        vectors = np.vstack([np.frombuffer(row.embedding, dtype=np.float32) for row in chunk])
+        sims = vectors @ company_vec
+        db.bulk_update_mappings(Tender, [
+            {
+                "id": row.id,
+                "semantic_score": round(float(sim) * 100, 2),
+                "semantic_similarity": round(float(sim), 4),
+                "is_excluded": excluded is not None and excluded.search(row.matching_text) is not None
+            }
+            for row, sim in zip(chunk, sims)
+        ])
+        last_id = chunk[-1].id
+        total += len(chunk)
+
+
+def sync_tenders(db: Session, profile: dict, csv_path: str) -> dict:
+    """
+    Make the table match the CSV and profile. Everything that needs
+    the model is encoded first, with no write transaction open; the upsert
+    and rescore then run in one short transaction, so other writers are
+    barely blocked and readers see the previous catalogue until the commit.
+    """
+    rows = _csv_rows(csv_path)
+    stale = _stale(rows, _stored(db))
+    db.rollback()   # end the read before the slow part
+    _encode_rows(stale)
+    company_vec = encode_tenders([profile["profile_text"]])[0]
+
+    try:
+        counts = upsert_tenders(db, rows)
+        total = rescore_tenders(db, profile, company_vec)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    encoded = len(stale) + counts.pop("late_encoded")
+    print(f"[TENDERS] Synced {total} tender(s): {counts['inserted']} new, "
+          f"{counts['updated']} changed, {counts['removed']} removed, {encoded} encoded")
+    return {**counts, "total_tenders": total, "encoded": encoded, "reused": total - encoded}
+
+
+# ─── Queries ──────────────────────────────────────────────────────────────────
+
+def query_tenders(db: Session, include_excluded: bool = False,
+                  min_score: float = 0.0, keyword: str | None = None):
+    """Tenders by descending score; callers apply offset / limit."""
+    query = db.query(Tender)
+    if not include_excluded:
+        query = query.filter(Tender.is_excluded.is_(False))
+    if min_score:
+        query = query.filter(Tender.semantic_score >= min_score)
+    if keyword:
+        kw = keyword.lower()
+        query = query.filter(or_(
+            func.lower(Tender.title).contains(kw, autoescape=True),
+            func.lower(Tender.project_description).contains(kw, autoescape=True)
+        ))
+    return query.order_by(Tender.semantic_score.desc(), Tender.id)
+
+
+def count_tenders(db: Session) -> int:
+    return db.query(func.count(Tender.id)).scalar() or 0
+
+
+def tender_stats(db: Session) -> dict:
+    """Dataset KPIs in one aggregate query."""
+    today = date.today()
+    score = Tender.semantic_score
+
+    def count_if(condition):
+        return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+    row = db.query(
+        func.count(Tender.id),
+        func.avg(score),
+        func.max(score),
+        func.min(score),
+        count_if(Tender.is_excluded.is_(True)),
+        count_if(score >= 70),
+        count_if((score >= 40) & (score < 70)),
+        count_if(score < 40),
+        # days_to_deadline in [0, 30]: the deadline is tomorrow .. today + 31
+        count_if((Tender.deadline > today) & (Tender.deadline <= today + timedelta(days=31)))
+    ).one()
+    total, avg, high_s, low_s, excluded, high, medium, low, upcoming = row
+    return {
+        "total_tenders": total,
+        "avg_semantic_score": round(avg or 0.0, 2),
+        "max_semantic_score": high_s or 0.0,
+        "min_semantic_score": low_s or 0.0,
+        "excluded_count": excluded,
+        "eligible_count": total - excluded,
+        "score_buckets": {"high": high, "medium": medium, "low": low},
+        "upcoming_deadlines": upcoming
+    }
@@ -0,0 +1,31 @@
+"""
+Dedicated worker pools for blocking work done on behalf of async endpoints.
+
+- pdf_executor:       processes, pdfplumber parsing is pure-Python CPU work.
+                      Spawned, not forked: the parent already runs flusher,
+                      rebuild, ingestion and Groq threads, and a child forked
+                      while one of them holds a lock would deadlock on it
+- embedding_executor: threads, torch releases the GIL during inference
+- io_executor:        threads, SQLite commits and file writes
+LLM calls use skill_extractor.groq_executor.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import asyncio
+import functools
+import multiprocessing
+
+from config import PDF_WORKERS, EMBEDDING_WORKERS, IO_WORKERS
+
+pdf_executor = ProcessPoolExecutor(
+    max_workers=PDF_WORKERS,
+    mp_context=multiprocessing.get_context("spawn")
+)
+embedding_executor = ThreadPoolExecutor(max_workers=EMBEDDING_WORKERS, thread_name_prefix="embed")
+io_executor = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="io")
+
+
+async def run_in(executor, fn, *args, **kwargs):
+    """Await fn(*args, **kwargs) on the given pool without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(fn, *args, **kwargs))
@@ -1,6 +1,7 @@
 import axios from "axios";
 import {
   UploadedCV,
+  IngestionTask,
   MatchResponse,
   TenderDetectRequest,
   TenderDetectResponse,
@@ -12,7 +13,31 @@ const API = axios.create({
   baseURL: "http://localhost:8000",
 });
 
-// Upload CV with job_id
+// Poll an ingestion task until the backend has finished processing the CV
+export const waitForTask = async (
+  taskId: string,
+  intervalMs = 1000,
+  maxAttempts = 600
+): Promise<UploadedCV> => {
+  for (let attempt = 0; attempt < maxAttempts; attempt++) {
+    const res = await API.get<IngestionTask>(`/cvs/tasks/${taskId}`);
+    const task = res.data;
+    if (task.status === "done") {
+      if (task.cv) return task.cv;
+      throw new Error(`${task.filename} was removed after processing`);
+    }
+    if (task.status === "failed") {
+      throw new Error(task.error || `Processing failed for ${task.filename}`);
+    }
+    if (task.status === "cancelled") {
+      throw new Error(`Processing of ${task.filename} was cancelled`);
+    }
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
+  throw new Error(`Timed out waiting for task ${taskId}`);
+};
+
+// Upload CV with job_id — the backend queues it, we wait for the result
 export const uploadCV = async (
   file: File,
   jobId: number
@@ -20,8 +45,8 @@ export const uploadCV = async (
   const formData = new FormData();
   formData.append("file", file);
   formData.append("job_id", String(jobId));
-  const res = await API.post<UploadedCV>("/cvs/upload", formData);
-  return res.data;
+  const res = await API.post<IngestionTask>("/cvs/upload", formData);
+  return waitForTask(res.data.task_id);
 };
 
 // Get all CVs for a specific job
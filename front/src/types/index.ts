@@ -11,6 +11,17 @@ export interface UploadedCV {
   uploaded_at: string;
 }
 
+export interface IngestionTask {
+  task_id: string;
+  job_id: number;
+  filename: string;
+  status: "queued" | "running" | "done" | "failed" | "cancelled";
+  error: string | null;
+  cv: UploadedCV | null;
+  created_at: string;
+  finished_at: string | null;
+}
+
 export interface CandidateMatch {
   cv_id: number;
   filename: string;
@@ -43,6 +54,7 @@ export interface MatchResponse {
   explanation: string | null;
   near_misses: NearMissCandidate[] | null;
   suggestions: string[] | null;
+  llm_calls_saved?: number;
 }
 
 export interface Job {
@@ -88,6 +100,7 @@ export interface TenderDetectRequest {
   min_score?: number;
   include_excluded?: boolean;
   keyword?: string;
+  offset?: number;
 }
 
 export interface TenderDetectResponse {